@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""Hot-reloadable question bank for long-running processes.
+
+BankManager owns the current BankSnapshot: an immutable view of the bank
+plus its indexes (by ID, by topic, full-text search, validation issues).
+A background thread polls the bank file's mtime/size; when it changes the
+file is re-read, a new snapshot is built off to the side, and the manager's
+reference is swapped in one assignment. Sessions call snapshot() once and
+keep using that object, so an in-flight exam never sees questions change
+under it.
+
+Per-question work (parsing, tokenizing for search, validation) is cached
+under a tuple of the entry's fields (topic, prompt, options, correct,
+explanations), so a reload only redoes it for questions that were added or
+edited, and the search index is patched rather than rebuilt.
+"""
+from __future__ import annotations
+
+import gc
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+
+from ikm_python_practice import Question, question_from_dict, question_id
+from bank_validator import check_question, check_structure
+from search_index import SearchIndex, question_terms
+
+POLL_SECONDS = 1.0
+
+
+@dataclass(frozen=True)
+class BankSnapshot:
+    version: int
+    loaded_at: float
+    build_ms: float
+    questions: Tuple[Question, ...]
+    by_id: Mapping[str, Question]
+    by_topic: Mapping[str, Tuple[str, ...]]
+    issues: Mapping[str, Tuple[Tuple[str, str, str], ...]]   # question ID -> check_question() output
+    search: SearchIndex
+
+
+@dataclass(frozen=True)
+class _Entry:
+    """Everything derived from one bank entry; reused while its content is unchanged."""
+    question: Question
+    qid: str
+    terms: Counter
+    issues: Tuple[Tuple[str, str, str], ...]
+
+
+def _entry_key(d: dict) -> tuple:
+    """Hashable key over the fields an _Entry is derived from. Building it is
+    much cheaper than serializing and hashing the entry."""
+    expl = d.get("explanations", {})
+    return (d["topic"], d["prompt"], tuple(d["options"]), tuple(d["correct"]), tuple(expl.items()))
+
+
+def _build_entry(d: dict, position: int) -> _Entry:
+    problems = check_structure(d)
+    if problems:
+        raise ValueError(f"entry #{position + 1}: {problems[0][2]}")
+    q = question_from_dict(d)
+    return _Entry(q, question_id(q), question_terms(q), tuple(map(tuple, check_question(d))))
+
+
+@contextmanager
+def _gc_paused():
+    """json.load of a large bank allocates enough objects to trigger repeated
+    cyclic GC passes over the whole entry cache. None of it is cyclic garbage,
+    so pause collection for the duration of the reload."""
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+class BankManager:
+    def __init__(
+        self,
+        path: str,
+        poll_seconds: float = POLL_SECONDS,
+        on_reload: Optional[Callable[[BankSnapshot, int], None]] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+    ) -> None:
+        self.path = path
+        self.poll_seconds = poll_seconds
+        self.on_reload = on_reload
+        self.on_error = on_error
+        self._entries: Dict[tuple, _Entry] = {}
+        # Search index slot for each (entry key, occurrence) so unchanged entries
+        # keep their postings across reloads.
+        self._slots: Dict[Tuple[tuple, int], int] = {}
+        self._stat: Optional[Tuple[int, int]] = None
+        self._current: Optional[BankSnapshot] = None
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.reload()
+
+    # ----- readers -----
+
+    def snapshot(self) -> BankSnapshot:
+        """The current snapshot. Hold on to it for the length of a session."""
+        return self._current
+
+    # ----- reloading -----
+
+    def _file_stat(self) -> Tuple[int, int]:
+        st = os.stat(self.path)
+        return st.st_mtime_ns, st.st_size
+
+    def reload(self) -> int:
+        """Re-read the bank and swap in a new snapshot. Returns the number of
+        entries that had to be rebuilt. Raises on unreadable/invalid JSON or a
+        malformed entry and leaves the current snapshot in place.
+
+        Parsing the JSON and keying each entry are O(bank); tokenizing,
+        validation and search postings are only redone for changed entries.
+        """
+        with self._reload_lock, _gc_paused():
+            t0 = time.perf_counter()
+            stat = self._file_stat()
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            if not isinstance(raw, list):
+                raise ValueError(f"{self.path}: expected a JSON list of questions")
+
+            entries: Dict[tuple, _Entry] = {}
+            order: List[_Entry] = []
+            keys: List[Tuple[tuple, int]] = []
+            seen: Counter = Counter()
+            rebuilt = 0
+            for pos, d in enumerate(raw):
+                try:
+                    key = _entry_key(d)
+                except (KeyError, TypeError, AttributeError):
+                    _build_entry(d, pos)   # raises with the structural problem
+                    raise
+                e = self._entries.get(key) or entries.get(key)
+                if e is None:
+                    e = _build_entry(d, pos)
+                    rebuilt += 1
+                entries[key] = e
+                order.append(e)
+                keys.append((key, seen[key]))
+                seen[key] += 1
+
+            # Reuse slots of entries still present; free slots go to new ones.
+            slots: Dict[Tuple[tuple, int], int] = {}
+            new_keys = []
+            for k in keys:
+                slot = self._slots.get(k)
+                if slot is None:
+                    new_keys.append(k)
+                else:
+                    slots[k] = slot
+            gone = {slot: k for k, slot in self._slots.items() if k not in slots}
+            free = sorted(gone, reverse=True)
+            next_slot = max(self._slots.values(), default=-1) + 1
+            added = {}
+            for k in new_keys:
+                if free:
+                    slot = free.pop()
+                else:
+                    slot, next_slot = next_slot, next_slot + 1
+                slots[k] = slot
+                e = entries[k[0]]
+                added[slot] = (e.qid, e.question.topic, e.terms)
+            removed = {slot: self._entries[k[0]].terms for slot, k in gone.items()}
+            positions: List[Optional[int]] = [None] * (max(slots.values(), default=-1) + 1)
+            for pos, k in enumerate(keys):
+                positions[slots[k]] = pos
+
+            prev = self._current
+            base = prev.search if prev else SearchIndex([], [], [], {}, "")
+            # The fingerprint only has to identify this content; the slot-indexed
+            # snapshot index is never persisted.
+            fingerprint = hashlib.sha1("\0".join(e.qid for e in order).encode("ascii")).hexdigest()
+
+            search = base.with_changes(removed, added, positions, fingerprint)
+            by_topic: Dict[str, List[str]] = {}
+            for e in order:
+                by_topic.setdefault(e.question.topic, []).append(e.qid)
+            snap = BankSnapshot(
+                version=(prev.version + 1) if prev else 1,
+                loaded_at=time.time(),
+                build_ms=(time.perf_counter() - t0) * 1000,
+                questions=tuple(e.question for e in order),
+                by_id=MappingProxyType({e.qid: e.question for e in order}),
+                by_topic=MappingProxyType({t: tuple(ids) for t, ids in by_topic.items()}),
+                issues=MappingProxyType({e.qid: e.issues for e in order if e.issues}),
+                search=search,
+            )
+            # Dropping entries no longer in the file keeps the cache the size of the bank.
+            self._entries = entries
+            self._slots = slots
+            self._stat = stat
+            self._current = snap   # the atomic swap
+        if self.on_reload:
+            self.on_reload(snap, rebuilt)
+        return rebuilt
+
+    def _poll(self) -> None:
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                stat = self._file_stat()
+            except OSError:
+                continue  # mid-rename or briefly missing; try again next tick
+            if stat == self._stat:
+                continue
+            try:
+                self.reload()
+            except Exception as e:
+                # Half-written or broken file: keep serving the old snapshot and
+                # do not retry until the file changes again. Anything a bad
+                # entry can raise lands here so the watcher thread never dies.
+                self._stat = stat
+                if self.on_error:
+                    self.on_error(e)
+
+    def start(self) -> "BankManager":
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._poll, name="bank-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "BankManager":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+# ---------------- CLI ----------------
+
+def cli(args) -> None:
+    def reloaded(snap: BankSnapshot, rebuilt: int) -> None:
+        print(f"[v{snap.version}] {len(snap.questions)} questions, {len(snap.by_topic)} topics, "
+              f"{rebuilt} rebuilt, {len(snap.issues)} with issues ({snap.build_ms:.1f} ms)")
+
+    def failed(e: Exception) -> None:
+        print(f"[reload failed, keeping current snapshot] {type(e).__name__}: {e}")
+
+    manager = BankManager(args.bank, poll_seconds=args.interval, on_reload=reloaded, on_error=failed)
+    print(f"Watching {args.bank} every {args.interval}s (Ctrl-C to stop).")
+    with manager:
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""Question bank validator.
+
+Per-question checks run across a process pool for large banks, and each
+verdict is cached under the question's content hash so re-validating a
+bank only touches questions that were edited. Bank-wide checks (duplicate
+IDs/prompts) are cheap and always run.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ikm_python_practice import (
+    LETTERS, Question, bank, question_from_dict, question_id, question_to_dict,
+)
+
+# Bump when checks change so stale cached verdicts are discarded.
+VALIDATOR_VERSION = 2
+DEFAULT_CACHE = ".bank_validation_cache.json"
+
+# Below this many uncached questions a process pool costs more than it saves.
+PARALLEL_THRESHOLD = 2000
+
+# One canonical name per topic.
+KNOWN_TOPICS = frozenset({
+    "Asyncio", "Basics", "Bitwise", "Closures", "Collections", "Comprehensions", "Concurrency",
+    "Context Managers", "Control Flow", "CPython Internals", "Data Structures", "Dataclasses",
+    "Decorators", "Descriptors", "Dicts", "Encapsulation", "Evaluation Order", "Exceptions",
+    "Formatting", "Functional", "Functions", "Functions as Objects", "Functools",
+    "Garbage Collection", "Generators", "GIL", "Hashing", "Imports", "IO", "Iterators",
+    "Itertools", "Memory", "Metaclasses", "MRO", "Multiprocessing", "Mutability", "Numerics",
+    "OOP", "Operators", "Performance", "Pitfalls", "Precedence", "References", "Regex", "Scope",
+    "Security", "Sequences", "Sets", "Sorting", "Stdlib", "Strings", "Strings/Bytes", "Testing",
+    "Truthiness", "Typing", "Weak References",
+})
+
+# Names that have drifted into banks for a topic above -> the canonical name.
+TOPIC_ALIASES = {
+    "Async": "Asyncio",
+    "Contextlib": "Context Managers",
+    "Dictionaries": "Dicts",
+    "Evaluation": "Evaluation Order",
+    "File IO": "IO",
+    "Files & JSON": "IO",
+    "Functional Programming": "Functional",
+    "Iteration Protocol": "Iterators",
+    "Math": "Numerics",
+}
+
+ERROR = "error"
+WARNING = "warning"
+
+
+@dataclass(frozen=True)
+class Issue:
+    question_id: str
+    index: int          # position in the bank, -1 for bank-wide issues
+    severity: str       # ERROR or WARNING
+    code: str           # machine-readable, e.g. "correct-out-of-range"
+    message: str
+
+
+# ---------------- Per-question checks ----------------
+
+def content_hash(d: dict) -> str:
+    blob = json.dumps(d, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha1(blob + b"\0" + str(VALIDATOR_VERSION).encode("ascii")).hexdigest()
+
+
+def check_structure(d) -> List[Tuple[str, str, str]]:
+    """Check that a raw bank entry has the fields and types question_from_dict
+    needs. Entries that fail here are not checked any further."""
+    if not isinstance(d, dict):
+        return [(ERROR, "bad-type", f"Entry must be an object, got {type(d).__name__}.")]
+    out: List[Tuple[str, str, str]] = []
+    for key in ("topic", "prompt", "options", "correct"):
+        if key not in d:
+            out.append((ERROR, "missing-field", f"Missing required field {key!r}."))
+    for key in ("topic", "prompt"):
+        if key in d and not isinstance(d[key], str):
+            out.append((ERROR, "bad-type", f"{key!r} must be a string."))
+    if "options" in d and not (isinstance(d["options"], list) and all(isinstance(o, str) for o in d["options"])):
+        out.append((ERROR, "bad-type", "'options' must be a list of strings."))
+    if "correct" in d and not (isinstance(d["correct"], list)
+                               and all(isinstance(c, int) and not isinstance(c, bool) for c in d["correct"])):
+        out.append((ERROR, "bad-type", "'correct' must be a list of integer option indices."))
+    if "explanations" in d:
+        expl = d["explanations"]
+        if not (isinstance(expl, dict) and all(isinstance(v, str) for v in expl.values())):
+            out.append((ERROR, "bad-type", "'explanations' must map option indices to strings."))
+        elif not all(re.fullmatch(r"-?[0-9]+", k) for k in expl):
+            out.append((ERROR, "bad-type", "'explanations' keys must be option indices like \"0\"."))
+    return out
+
+
+def check_question(d: dict) -> List[Tuple[str, str, str]]:
+    """Check one question (as exported by question_to_dict).
+
+    Returns (severity, code, message) tuples. Works on plain dicts so it can be
+    shipped to worker processes cheaply.
+    """
+    out: List[Tuple[str, str, str]] = []
+    options = d["options"]
+    correct = d["correct"]
+    expl = {int(k): v for k, v in d["explanations"].items()}
+    n = len(options)
+
+    if not d["prompt"].strip():
+        out.append((ERROR, "empty-prompt", "Prompt is empty."))
+    if n < 2:
+        out.append((ERROR, "too-few-options", f"Needs at least 2 options, has {n}."))
+    if n > len(LETTERS):
+        out.append((ERROR, "too-many-options", f"{n} options but only {len(LETTERS)} answer letters."))
+    for i, opt in enumerate(options):
+        # An empty option can be a legitimate answer (e.g. the output of 'ab' * 0).
+        if not str(opt).strip():
+            out.append((WARNING, "empty-option", f"Option {LETTERS[i % len(LETTERS)]} is empty."))
+    if len(set(options)) != n:
+        out.append((ERROR, "duplicate-option", "Two or more options have identical text."))
+
+    if not correct:
+        out.append((ERROR, "no-correct", "No correct option marked."))
+    bad = sorted(c for c in correct if not 0 <= c < n)
+    if bad:
+        out.append((ERROR, "correct-out-of-range", f"Correct indices {bad} are outside 0..{n - 1}."))
+
+    missing = sorted(set(range(n)) - set(expl))
+    if missing:
+        out.append((ERROR, "missing-explanation", f"No explanation for option(s) {''.join(LETTERS[i] for i in missing if i < len(LETTERS))}."))
+    extra = sorted(set(expl) - set(range(n)))
+    if extra:
+        out.append((ERROR, "extra-explanation", f"Explanations for non-existent option indices {extra}."))
+    for i, text in sorted(expl.items()):
+        if not 0 <= i < n:
+            continue
+        if not text.strip():
+            out.append((ERROR, "empty-explanation", f"Explanation for {LETTERS[i]} is empty."))
+        elif i in correct and text.startswith("Wrong"):
+            out.append((ERROR, "explanation-verdict", f"Option {LETTERS[i]} is correct but its explanation says 'Wrong'."))
+        elif i not in correct and text.startswith("Correct"):
+            out.append((ERROR, "explanation-verdict", f"Option {LETTERS[i]} is wrong but its explanation says 'Correct'."))
+
+    topic = d["topic"]
+    if topic in TOPIC_ALIASES:
+        out.append((WARNING, "topic-alias", f"Topic {topic!r} is an alias; use {TOPIC_ALIASES[topic]!r}."))
+    elif topic not in KNOWN_TOPICS:
+        out.append((WARNING, "unknown-topic", f"Topic {topic!r} is not in the known vocabulary."))
+    if "select all" in d["prompt"].lower() and len(correct) < 2:
+        out.append((WARNING, "select-all-single", "Prompt says 'Select ALL' but only one option is correct."))
+    return out
+
+
+def _check_batch(batch: List[Tuple[str, dict]]) -> List[Tuple[str, List[Tuple[str, str, str]]]]:
+    return [(h, check_question(d)) for h, d in batch]
+
+
+def _chunks(items: List, size: int) -> Iterable[List]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+# ---------------- Cache ----------------
+
+def load_cache(path: Optional[str]) -> Dict[str, list]:
+    if not path:
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data.get("verdicts", {}) if data.get("version") == VALIDATOR_VERSION else {}
+
+
+def save_cache(path: Optional[str], verdicts: Dict[str, list]) -> None:
+    if not path:
+        return
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": VALIDATOR_VERSION, "verdicts": verdicts}, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+# ---------------- Validation ----------------
+
+def validate_entries(
+    entries: list,
+    cache_path: Optional[str] = DEFAULT_CACHE,
+    workers: Optional[int] = None,
+) -> Tuple[List[Issue], int]:
+    """Validate raw bank entries (as read from a JSON bank). Malformed entries
+    are reported as missing-field / bad-type issues; the rest go through
+    validate_bank. Returns (issues, number of questions actually re-checked)."""
+    structural: List[Issue] = []
+    questions: List[Question] = []
+    positions: List[int] = []
+    for i, d in enumerate(entries):
+        found = check_structure(d)
+        if found:
+            structural.extend(Issue("?", i, *f) for f in found)
+        else:
+            questions.append(question_from_dict(d))
+            positions.append(i)
+    issues, checked = validate_bank(questions, cache_path, workers)
+    # Report positions in the file, not among the well-formed entries.
+    issues = [Issue(x.question_id, positions[x.index] if x.index >= 0 else -1, x.severity, x.code, x.message)
+              for x in issues]
+    return sorted(structural + issues, key=lambda x: x.index), checked
+
+
+def validate_bank(
+    questions: List[Question],
+    cache_path: Optional[str] = DEFAULT_CACHE,
+    workers: Optional[int] = None,
+) -> Tuple[List[Issue], int]:
+    """Validate a bank. Returns (issues, number of questions actually re-checked)."""
+    dicts = [question_to_dict(q) for q in questions]
+    hashes = [content_hash(d) for d in dicts]
+    cache = load_cache(cache_path)
+
+    todo = {}
+    for h, d in zip(hashes, dicts):
+        if h not in cache:
+            todo[h] = d
+    pending = list(todo.items())
+
+    if len(pending) >= PARALLEL_THRESHOLD and workers != 1:
+        workers = workers or os.cpu_count() or 1
+        size = max(64, len(pending) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            for results in ex.map(_check_batch, _chunks(pending, size)):
+                for h, found in results:
+                    cache[h] = found
+    else:
+        for h, found in _check_batch(pending):
+            cache[h] = found
+
+    issues: List[Issue] = []
+    ids = []
+    for i, (q, h) in enumerate(zip(questions, hashes)):
+        qid = question_id(q)
+        ids.append(qid)
+        for severity, code, message in cache[h]:
+            issues.append(Issue(qid, i, severity, code, message))
+
+    seen: Dict[str, int] = {}
+    for i, qid in enumerate(ids):
+        if qid in seen:
+            issues.append(Issue(qid, i, ERROR, "duplicate-question",
+                                f"Same prompt and options as question #{seen[qid] + 1}."))
+        else:
+            seen[qid] = i
+
+    # Only keep verdicts for questions still in the bank so the cache cannot grow forever.
+    live = set(hashes)
+    save_cache(cache_path, {h: v for h, v in cache.items() if h in live})
+    return issues, len(pending)
+
+
+# ---------------- CLI ----------------
+
+def cli(args) -> int:
+    cache_path = None if args.no_cache else args.cache
+    if args.bank is None:
+        entries = [question_to_dict(q) for q in bank()]
+    else:
+        try:
+            with open(args.bank, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[Validate] Cannot read {args.bank}: {e}")
+            return 1
+        if not isinstance(entries, list):
+            print(f"[Validate] {args.bank}: expected a JSON list of questions.")
+            return 1
+    issues, checked = validate_entries(entries, cache_path=cache_path, workers=args.workers)
+
+    if args.json:
+        for issue in issues:
+            print(json.dumps(asdict(issue), ensure_ascii=False))
+    else:
+        for issue in issues:
+            where = f"#{issue.index + 1}" if issue.index >= 0 else "bank"
+            print(f"{issue.severity.upper():<7} {where:>6} [{issue.question_id}] {issue.code}: {issue.message}")
+        errors = sum(1 for i in issues if i.severity == ERROR)
+        print(f"\n{len(entries)} questions ({checked} re-checked): "
+              f"{errors} error(s), {len(issues) - errors} warning(s).")
+
+    return 1 if any(i.severity == ERROR for i in issues) else 0
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""Answer-similarity (collusion) detection over the per-response log.
+
+Every distinct (question, selected options) pair gets a feature number, and
+each attempt is packed into Python int bitsets:
+
+    answered  bit per question ID answered
+    chosen    bit per (question, selection) feature
+    wrong     the subset of `chosen` that was incorrect
+
+Similarity between two attempts is then a handful of AND + popcount
+operations. Matching *wrong* answers are the strong signal (matching right
+answers mostly mean both candidates know the material), so candidate pairs
+are found by MinHash LSH over the wrong-answer sets: only attempts that
+collide in at least one band are compared, avoiding all O(n^2) pairs.
+"""
+from __future__ import annotations
+
+import csv
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from ikm_python_practice import RESPONSES_CSV
+
+# MinHash / LSH parameters: BANDS * ROWS hash functions. With 16 bands of 4
+# rows a pair with wrong-answer Jaccard 0.5 collides with p ~ 0.64, at 0.7 ~ 0.99.
+BANDS = 16
+ROWS = 4
+_PRIME = (1 << 61) - 1
+
+MIN_SHARED_WRONG = 4      # fewer identical wrong answers than this is never reported
+DEFAULT_THRESHOLD = 0.6   # wrong-answer Jaccard similarity
+
+
+if hasattr(int, "bit_count"):  # Python 3.10+
+    popcount = int.bit_count
+else:
+    def popcount(x: int) -> int:
+        return bin(x).count("1")
+
+
+@dataclass
+class Candidate:
+    attempt_id: str
+    answered: int = 0
+    chosen: int = 0
+    wrong: int = 0
+    wrong_features: List[int] = field(default_factory=list)  # for MinHash
+
+
+@dataclass(frozen=True)
+class SuspectPair:
+    a: str
+    b: str
+    shared: int            # questions both answered
+    identical: int         # identical selections on shared questions
+    identical_wrong: int   # identical *incorrect* selections
+    wrong_jaccard: float
+
+
+def load_candidates(path: str = RESPONSES_CSV) -> List[Candidate]:
+    questions: Dict[str, int] = {}
+    features: Dict[Tuple[int, str], int] = {}
+    by_attempt: Dict[str, Candidate] = {}
+    with open(path, "r", newline="", encoding="utf-8") as fh:
+        for row in csv.DictReader(fh):
+            c = by_attempt.get(row["attempt_id"])
+            if c is None:
+                c = by_attempt[row["attempt_id"]] = Candidate(row["attempt_id"])
+            q = questions.setdefault(row["question_id"], len(questions))
+            f = features.setdefault((q, row["selected"]), len(features))
+            c.answered |= 1 << q
+            c.chosen |= 1 << f
+            if row["is_correct"] != "1":
+                c.wrong |= 1 << f
+                c.wrong_features.append(f)
+    return list(by_attempt.values())
+
+
+# ---------------- LSH ----------------
+
+def _hash_params(seed: int) -> List[Tuple[int, int]]:
+    rng = random.Random(seed)
+    return [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(BANDS * ROWS)]
+
+
+def minhash(features: List[int], params: List[Tuple[int, int]]) -> List[int]:
+    return [min((a * f + b) % _PRIME for f in features) for a, b in params]
+
+
+def candidate_pairs(cands: List[Candidate], seed: int = 0) -> set:
+    params = _hash_params(seed)
+    buckets: Dict[Tuple[int, Tuple[int, ...]], List[int]] = defaultdict(list)
+    for idx, c in enumerate(cands):
+        if len(c.wrong_features) < MIN_SHARED_WRONG:
+            continue
+        sig = minhash(c.wrong_features, params)
+        for band in range(BANDS):
+            buckets[(band, tuple(sig[band * ROWS:(band + 1) * ROWS]))].append(idx)
+
+    pairs = set()
+    for members in buckets.values():
+        for i in range(len(members)):
+            for j in range(i + 1, len(members)):
+                pairs.add((members[i], members[j]))
+    return pairs
+
+
+def compare(a: Candidate, b: Candidate) -> SuspectPair:
+    both = a.answered & b.answered
+    same_wrong = popcount(a.wrong & b.wrong)
+    union_wrong = popcount(a.wrong | b.wrong)
+    return SuspectPair(
+        a=a.attempt_id,
+        b=b.attempt_id,
+        shared=popcount(both),
+        identical=popcount(a.chosen & b.chosen),
+        identical_wrong=same_wrong,
+        wrong_jaccard=same_wrong / union_wrong if union_wrong else 0.0,
+    )
+
+
+def find_suspects(cands: List[Candidate], threshold: float = DEFAULT_THRESHOLD, seed: int = 0) -> List[SuspectPair]:
+    out = []
+    for i, j in candidate_pairs(cands, seed):
+        s = compare(cands[i], cands[j])
+        if s.identical_wrong >= MIN_SHARED_WRONG and s.wrong_jaccard >= threshold:
+            out.append(s)
+    out.sort(key=lambda s: (-s.wrong_jaccard, -s.identical_wrong))
+    return out
+
+
+# ---------------- CLI ----------------
+
+def cli(args) -> None:
+    t0 = time.perf_counter()
+    cands = load_candidates(args.responses)
+    t1 = time.perf_counter()
+    suspects = find_suspects(cands, args.threshold, args.seed)
+    t2 = time.perf_counter()
+
+    n = len(cands)
+    print(f"{n} attempts (load {t1 - t0:.2f}s, compare {t2 - t1:.2f}s; "
+          f"all-pairs would be {n * (n - 1) // 2} comparisons)\n")
+    print(f"{'attempt A':<14}{'attempt B':<14}{'shared':>7}{'same':>6}{'same wrong':>11}{'jaccard':>9}")
+    for s in suspects[:args.limit]:
+        print(f"{s.a:<14}{s.b:<14}{s.shared:>7}{s.identical:>6}{s.identical_wrong:>11}{s.wrong_jaccard:>9.2f}")
+    print(f"\n{len(suspects)} pair(s) at or above wrong-answer similarity {args.threshold}.")
+
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["attempt_a", "attempt_b", "shared", "identical", "identical_wrong", "wrong_jaccard"])
+            for s in suspects:
+                w.writerow([s.a, s.b, s.shared, s.identical, s.identical_wrong, f"{s.wrong_jaccard:.4f}"])
+        print(f"Wrote {args.csv}")
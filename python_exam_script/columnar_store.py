@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""Typed columnar storage for attempts and per-question responses.
+
+Converts practice_results.csv and practice_responses.csv into one of:
+
+- npy (default): a directory with one .npy file per column, so every column
+  can be opened with np.load(..., mmap_mode="r") and scanned without parsing
+  or copying. String columns are dictionary-encoded: an int32 code column
+  plus the distinct values in meta.json.
+- arrow: Arrow IPC files (attempts.arrow, responses.arrow) with dictionary
+  columns, readable zero-copy via pyarrow.memory_map. Needs pyarrow.
+
+Layout (npy):
+    <out>/meta.json
+    <out>/attempts/{attempt,timestamp,attempted,correct,score_pct,duration_sec,total_questions}.npy
+    <out>/responses/{attempt,question,form,topic,selected,n_options,correct,elapsed_ms}.npy
+"""
+from __future__ import annotations
+
+import csv
+import json
+import os
+import time
+from array import array
+from typing import Dict, List, Optional
+
+from ikm_python_practice import RESPONSES_CSV, RESULTS_CSV
+
+# Optional (pip install numpy)
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+# Optional (pip install pyarrow)
+try:
+    import pyarrow as pa
+except Exception:
+    pa = None
+
+FORMAT_VERSION = 1
+DEFAULT_OUT = "analytics"
+
+
+# ---------------- Reading CSV ----------------
+
+def read_attempts_csv(path: str = RESULTS_CSV, attempt_codes: Optional[Dict[str, int]] = None) -> Dict[str, "np.ndarray"]:
+    """Attempt columns. `attempt` codes come from `attempt_codes` (the response
+    table's attempt dictionary), which is extended in place with attempts that
+    have no responses, so the two tables join on the code. Rows logged before
+    attempt_id existed share the code of ""."""
+    codes = {} if attempt_codes is None else attempt_codes
+    ts: List[str] = []
+    attempt, attempted, correct, duration, total = array("i"), array("i"), array("i"), array("i"), array("i")
+    score = array("d")
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            attempt.append(codes.setdefault(row.get("attempt_id") or "", len(codes)))
+            ts.append(row["timestamp"])
+            attempted.append(int(row["attempted"]))
+            correct.append(int(row["correct"]))
+            score.append(float(row["score_pct"]))
+            duration.append(int(row["duration_sec"]))
+            total.append(int(row["total_questions"]))
+    return {
+        "attempt": np.frombuffer(attempt, dtype=np.int32),
+        "timestamp": np.array(ts, dtype="datetime64[s]"),
+        "attempted": np.frombuffer(attempted, dtype=np.int32),
+        "correct": np.frombuffer(correct, dtype=np.int32),
+        "score_pct": np.frombuffer(score, dtype=np.float64),
+        "duration_sec": np.frombuffer(duration, dtype=np.int32),
+        "total_questions": np.frombuffer(total, dtype=np.int32),
+    }
+
+
+def read_responses_csv(path: str = RESPONSES_CSV):
+    """Returns (columns, dictionaries) with string columns dictionary-encoded.
+
+    The single parser for the response log; item_analysis builds its arrays
+    from this too. Rows are streamed straight into typed arrays.
+    """
+    attempts: Dict[str, int] = {}
+    questions: Dict[str, int] = {}
+    forms: Dict[str, int] = {}
+    topics: Dict[str, int] = {}
+    selections: Dict[str, int] = {}
+    a, q, fm, t, sel = array("i"), array("i"), array("i"), array("i"), array("i")
+    n_options, ok, elapsed = array("B"), array("B"), array("i")
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        r = csv.reader(f)
+        col = {name: i for i, name in enumerate(next(r))}
+        ia, iq, i_f, it, isel = (col[k] for k in ("attempt_id", "question_id", "form", "topic", "selected"))
+        i_nopt, i_ok, i_el = col["n_options"], col["is_correct"], col["elapsed_ms"]
+        for row in r:
+            a.append(attempts.setdefault(row[ia], len(attempts)))
+            q.append(questions.setdefault(row[iq], len(questions)))
+            fm.append(forms.setdefault(row[i_f], len(forms)))
+            t.append(topics.setdefault(row[it], len(topics)))
+            sel.append(selections.setdefault(row[isel], len(selections)))
+            n_options.append(int(row[i_nopt]))
+            ok.append(row[i_ok] == "1")
+            elapsed.append(int(row[i_el]))
+    columns = {
+        "attempt": np.frombuffer(a, dtype=np.int32),
+        "question": np.frombuffer(q, dtype=np.int32),
+        "form": np.frombuffer(fm, dtype=np.int32),
+        "topic": np.frombuffer(t, dtype=np.int32),
+        "selected": np.frombuffer(sel, dtype=np.int32),
+        "n_options": np.frombuffer(n_options, dtype=np.uint8),
+        "correct": np.frombuffer(ok, dtype=np.uint8),
+        "elapsed_ms": np.frombuffer(elapsed, dtype=np.int32),
+    }
+    dictionaries = {"attempt": list(attempts), "question": list(questions), "form": list(forms),
+                    "topic": list(topics), "selected": list(selections)}
+    return columns, dictionaries
+
+
+# ---------------- npy ----------------
+
+def write_npy(out: str, attempts: Optional[dict], responses: Optional[dict], dictionaries: Optional[dict]) -> None:
+    meta = {"version": FORMAT_VERSION, "dictionaries": dictionaries or {}, "rows": {}}
+    for table, cols in (("attempts", attempts), ("responses", responses)):
+        if cols is None:
+            continue
+        os.makedirs(os.path.join(out, table), exist_ok=True)
+        for name, arr in cols.items():
+            np.save(os.path.join(out, table, name + ".npy"), arr)
+        meta["rows"][table] = int(len(next(iter(cols.values()))))
+    with open(os.path.join(out, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+
+
+def load_npy(out: str, table: str) -> Dict[str, "np.ndarray"]:
+    """Memory-map every column of `table`; nothing is read until it is touched."""
+    d = os.path.join(out, table)
+    return {
+        name[:-4]: np.load(os.path.join(d, name), mmap_mode="r")
+        for name in sorted(os.listdir(d)) if name.endswith(".npy")
+    }
+
+
+def load_meta(out: str) -> dict:
+    with open(os.path.join(out, "meta.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# ---------------- Arrow ----------------
+
+def write_arrow(out: str, attempts: Optional[dict], responses: Optional[dict], dictionaries: Optional[dict]) -> None:
+    os.makedirs(out, exist_ok=True)
+    for table, cols in (("attempts", attempts), ("responses", responses)):
+        if cols is None:
+            continue
+        arrays, names = [], []
+        for name, arr in cols.items():
+            if dictionaries and name in dictionaries:
+                arrays.append(pa.DictionaryArray.from_arrays(
+                    pa.array(arr, type=pa.int32()), pa.array(dictionaries[name], type=pa.string())))
+            else:
+                arrays.append(pa.array(arr))
+            names.append(name)
+        batch = pa.record_batch(arrays, names=names)
+        with pa.OSFile(os.path.join(out, table + ".arrow"), "wb") as sink:
+            with pa.ipc.new_file(sink, batch.schema) as writer:
+                writer.write_batch(batch)
+
+
+def load_arrow(out: str, table: str):
+    """Zero-copy pyarrow Table backed by a memory map of the IPC file."""
+    return pa.ipc.open_file(pa.memory_map(os.path.join(out, table + ".arrow"), "r")).read_all()
+
+
+# ---------------- CLI ----------------
+
+def cli(args) -> None:
+    if np is None:
+        print("[Columnar] numpy not available. Install it with: pip install numpy")
+        return
+    if args.format == "arrow" and pa is None:
+        print("[Columnar] pyarrow not available. Install it with: pip install pyarrow")
+        return
+
+    t0 = time.perf_counter()
+    responses, dictionaries = (read_responses_csv(args.responses)
+                               if os.path.exists(args.responses) else (None, {}))
+    attempts = None
+    if os.path.exists(args.results):
+        codes = {a: i for i, a in enumerate(dictionaries.get("attempt", []))}
+        attempts = read_attempts_csv(args.results, codes)
+        dictionaries["attempt"] = list(codes)
+    if attempts is None and responses is None:
+        print(f"[Columnar] Neither {args.results} nor {args.responses} exists.")
+        return
+
+    (write_arrow if args.format == "arrow" else write_npy)(args.out, attempts, responses, dictionaries)
+    elapsed = time.perf_counter() - t0
+    rows = [f"{len(t['correct'])} {name}" for name, t in (("attempts", attempts), ("responses", responses)) if t]
+    print(f"Wrote {' and '.join(rows)} to {args.out}/ ({args.format}) in {elapsed:.2f}s.")
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""Parallel-forms exam assembler.
+
+Builds N forms of a fixed length whose topic mix matches the bank's topic
+proportions and whose mean difficulty matches the bank mean, while keeping
+the number of questions shared by any two forms under a limit.
+
+Each form starts from a quota-respecting random draw and is improved by a
+local search that swaps a question for another of the same topic (so topic
+balance is preserved) whenever that lowers the cost. Forms are built in
+batches across a process pool; sequential repair passes then take any form
+that overlaps too much with forms from other batches and re-optimize it from
+its current items. If the limit still does not hold, `assemble` lists the
+offending pairs and exits non-zero.
+
+Forms are exported as frozen bundles: an ordered list of question IDs plus
+a digest over them and the bank fingerprint.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from ikm_python_practice import Question, load_questions, question_id
+
+DEFAULT_P = 0.5       # difficulty assumed for items with no statistics yet
+
+# Cost weights (topic balance is a hard constraint, kept by same-topic swaps)
+W_DIFFICULTY = 20.0
+W_OVERLAP = 5.0
+W_EXPOSURE = 0.05
+
+SEARCH_STEPS = 4000
+STALE_STEPS = 600     # stop early after this many steps without improvement
+REPAIR_ROUNDS = 10     # rebuild passes over forms that still break the overlap limit
+
+
+# ---------------- Inputs ----------------
+
+def load_difficulties(questions: List[Question], bank_path: Optional[str], stats_path: str) -> List[float]:
+    """p-value per question from item_stats in the bank JSON or the stats sidecar."""
+    by_qid: Dict[str, float] = {}
+    if os.path.exists(stats_path):
+        with open(stats_path, "r", encoding="utf-8") as f:
+            for qid, s in json.load(f).items():
+                if s.get("p") is not None:
+                    by_qid[qid] = s["p"]
+    if bank_path:
+        with open(bank_path, "r", encoding="utf-8") as f:
+            for q, d in zip(questions, json.load(f)):
+                p = (d.get("item_stats") or {}).get("p")
+                if p is not None:
+                    by_qid[question_id(q)] = p
+    known = [by_qid[question_id(q)] for q in questions if question_id(q) in by_qid]
+    fallback = sum(known) / len(known) if known else DEFAULT_P
+    return [by_qid.get(question_id(q), fallback) for q in questions]
+
+
+def topic_quotas(topics: Sequence[int], n_topics: int, length: int) -> List[int]:
+    """Largest-remainder apportionment of `length` slots by topic share."""
+    counts = [0] * n_topics
+    for t in topics:
+        counts[t] += 1
+    exact = [c * length / len(topics) for c in counts]
+    quotas = [min(int(e), c) for e, c in zip(exact, counts)]
+    order = sorted(range(n_topics), key=lambda t: exact[t] - int(exact[t]), reverse=True)
+    i = 0
+    while sum(quotas) < length:
+        t = order[i % n_topics]
+        if quotas[t] < counts[t]:
+            quotas[t] += 1
+        i += 1
+    return quotas
+
+
+# ---------------- Local search ----------------
+
+class _Builder:
+    """Builds forms one at a time, tracking which earlier forms hold each item."""
+
+    def __init__(self, topics: List[int], p: List[float], length: int, max_overlap: int) -> None:
+        self.topics = topics
+        self.p = p
+        self.length = length
+        self.max_overlap = max_overlap
+        n_topics = max(topics) + 1
+        self.quotas = topic_quotas(topics, n_topics, length)
+        self.by_topic: List[List[int]] = [[] for _ in range(n_topics)]
+        for i, t in enumerate(topics):
+            self.by_topic[t].append(i)
+        self.target_p = sum(p) / len(p)
+        self.usage = [0] * len(topics)
+        self.item_forms: List[Set[int]] = [set() for _ in topics]
+        self.n_forms = 0
+
+    def add(self, form: List[int], form_no: Optional[int] = None) -> None:
+        form_no = self.n_forms if form_no is None else form_no
+        for i in form:
+            self.usage[i] += 1
+            self.item_forms[i].add(form_no)
+        self.n_forms = max(self.n_forms, form_no + 1)
+
+    def remove(self, form: List[int], form_no: int) -> None:
+        for i in form:
+            self.usage[i] -= 1
+            self.item_forms[i].discard(form_no)
+
+    def _cost(self, p_sum: float, excess: int, exposure: int) -> float:
+        diff = abs(p_sum / self.length - self.target_p)
+        return W_DIFFICULTY * diff * self.length + W_OVERLAP * excess + W_EXPOSURE * exposure
+
+    def build(self, rng: random.Random, start: Optional[List[int]] = None) -> List[int]:
+        """A new form, or an improved copy of `start` (never costlier than it)."""
+        M = self.max_overlap
+        form: List[int] = [] if start is None else start[:]
+        if start is None:
+            # Initial draw: fill each topic quota, preferring least-used items.
+            for t, quota in enumerate(self.quotas):
+                items = sorted(self.by_topic[t], key=lambda i: (self.usage[i], rng.random()))
+                form.extend(items[:quota])
+
+        members = set(form)
+        overlaps = [0] * self.n_forms
+        for i in form:
+            for f in self.item_forms[i]:
+                overlaps[f] += 1
+        excess = sum(o - M for o in overlaps if o > M)
+        p_sum = sum(self.p[i] for i in form)
+        exposure = sum(self.usage[i] for i in form)
+        cost = self._cost(p_sum, excess, exposure)
+
+        swappable = [k for k, i in enumerate(form) if len(self.by_topic[self.topics[i]]) > 1]
+        if not swappable:
+            return form
+        temp = 1.0
+        best, best_form = cost, form[:]
+        stale = 0
+        for _ in range(SEARCH_STEPS):
+            temp = max(0.01, temp * 0.998)
+            stale += 1
+            if stale > STALE_STEPS:
+                break
+            k = rng.choice(swappable)
+            out = form[k]
+            cand = rng.choice(self.by_topic[self.topics[out]])
+            if cand in members:
+                continue
+            # Only forms holding exactly one of the two items change overlap.
+            leaving = self.item_forms[out] - self.item_forms[cand]
+            joining = self.item_forms[cand] - self.item_forms[out]
+            d_excess = (sum(1 for f in joining if overlaps[f] >= M)
+                        - sum(1 for f in leaving if overlaps[f] > M))
+            new_p = p_sum - self.p[out] + self.p[cand]
+            new_exp = exposure - self.usage[out] + self.usage[cand]
+            new_cost = self._cost(new_p, excess + d_excess, new_exp)
+            # Simulated-annealing acceptance lets the search escape shallow minima early on.
+            if new_cost <= cost or rng.random() < math.exp((cost - new_cost) / temp):
+                form[k] = cand
+                members.discard(out)
+                members.add(cand)
+                for f in leaving:
+                    overlaps[f] -= 1
+                for f in joining:
+                    overlaps[f] += 1
+                excess += d_excess
+                p_sum, exposure, cost = new_p, new_exp, new_cost
+                if cost < best - 1e-9:
+                    best, best_form, stale = cost, form[:], 0
+        # Annealing may have wandered uphill since the best form it saw.
+        return best_form
+
+
+def _build_batch(job: Tuple[List[int], List[float], int, int, int, int]) -> List[List[int]]:
+    topics, p, length, max_overlap, count, seed = job
+    builder = _Builder(topics, p, length, max_overlap)
+    rng = random.Random(seed)
+    forms = []
+    for _ in range(count):
+        form = builder.build(rng)
+        builder.add(form)
+        forms.append(form)
+    return forms
+
+
+def _overlap(a: int, b: int) -> int:
+    return bin(a & b).count("1")
+
+
+def assemble_forms(
+    questions: List[Question],
+    p: List[float],
+    n_forms: int,
+    length: int,
+    max_overlap: int,
+    seed: int,
+    workers: Optional[int] = None,
+) -> List[List[int]]:
+    """Return `n_forms` lists of bank positions."""
+    length = min(length, len(questions))
+    topic_codes: Dict[str, int] = {}
+    topics = [topic_codes.setdefault(q.topic, len(topic_codes)) for q in questions]
+
+    workers = max(1, min(workers or os.cpu_count() or 1, n_forms))
+    per = [n_forms // workers + (1 if w < n_forms % workers else 0) for w in range(workers)]
+    jobs = [(topics, p, length, max_overlap, c, seed * 1000 + w) for w, c in enumerate(per) if c]
+    if len(jobs) == 1:
+        forms = _build_batch(jobs[0])
+    else:
+        with ProcessPoolExecutor(max_workers=len(jobs)) as ex:
+            forms = [f for batch in ex.map(_build_batch, jobs) for f in batch]
+
+    # Repair pass: batches did not see each other's forms.
+    builder = _Builder(topics, p, length, max_overlap)
+    for form in forms:
+        builder.add(form)
+    masks = [sum(1 << i for i in f) for f in forms]
+    rng = random.Random(seed)
+    for _ in range(REPAIR_ROUNDS):
+        clean = True
+        for k in range(len(forms)):
+            if any(_overlap(masks[k], masks[j]) > max_overlap for j in range(len(forms)) if j != k):
+                clean = False
+                builder.remove(forms[k], k)
+                forms[k] = builder.build(rng, forms[k])
+                builder.add(forms[k], k)
+                masks[k] = sum(1 << i for i in forms[k])
+        if clean:
+            break
+    return forms
+
+
+def overlap_violations(forms: List[List[int]], max_overlap: int) -> List[Tuple[int, int, int]]:
+    """(form index, form index, shared items) for every pair over the limit."""
+    masks = [sum(1 << i for i in f) for f in forms]
+    out = []
+    for a in range(len(masks)):
+        for b in range(a + 1, len(masks)):
+            n = _overlap(masks[a], masks[b])
+            if n > max_overlap:
+                out.append((a, b, n))
+    return out
+
+
+# ---------------- Export ----------------
+
+def form_digest(ids: List[str], fingerprint: str) -> str:
+    return hashlib.sha256((fingerprint + "\n" + "\n".join(ids)).encode("ascii")).hexdigest()
+
+
+def bank_id_digest(questions: List[Question]) -> str:
+    return hashlib.sha256("\n".join(sorted(question_id(q) for q in questions)).encode("ascii")).hexdigest()
+
+
+def export_forms(out_dir: str, questions: List[Question], p: List[float], forms: List[List[int]], seed: int) -> List[str]:
+    os.makedirs(out_dir, exist_ok=True)
+    fp = bank_id_digest(questions)
+    paths = []
+    for n, form in enumerate(forms, 1):
+        form_id = f"F{n:03d}"
+        ids = [question_id(questions[i]) for i in form]
+        topics: Dict[str, int] = {}
+        for i in form:
+            topics[questions[i].topic] = topics.get(questions[i].topic, 0) + 1
+        bundle = {
+            "form_id": form_id,
+            "seed": seed,
+            "bank_fingerprint": fp,
+            "question_ids": ids,
+            "topics": dict(sorted(topics.items())),
+            "mean_p": round(sum(p[i] for i in form) / len(form), 4),
+            "digest": form_digest(ids, fp),
+        }
+        path = os.path.join(out_dir, f"{form_id}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(bundle, f, indent=2)
+            f.write("\n")
+        paths.append(path)
+    return paths
+
+
+def load_form(path: str, questions: List[Question]) -> Tuple[str, List[Question]]:
+    """Resolve a frozen form bundle against a bank; refuses tampered bundles."""
+    with open(path, "r", encoding="utf-8") as f:
+        bundle = json.load(f)
+    ids = bundle["question_ids"]
+    if form_digest(ids, bundle["bank_fingerprint"]) != bundle["digest"]:
+        raise ValueError(f"{path}: digest mismatch, form bundle was modified")
+    by_id = {question_id(q): q for q in questions}
+    missing = [qid for qid in ids if qid not in by_id]
+    if missing:
+        raise ValueError(f"{path}: {len(missing)} question(s) not in this bank, e.g. {missing[0]}")
+    return bundle["form_id"], [by_id[qid] for qid in ids]
+
+
+# ---------------- CLI ----------------
+
+def cli(args) -> int:
+    questions = load_questions(args.bank)
+    p = load_difficulties(questions, args.bank, args.stats)
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 31)
+    length = min(args.length, len(questions))
+    # Two random forms share about length^2 / bank size items; aim a little above that.
+    default_overlap = max(length // 4, math.ceil(1.5 * length * length / len(questions)))
+    max_overlap = args.max_overlap if args.max_overlap is not None else default_overlap
+
+    t0 = time.perf_counter()
+    forms = assemble_forms(questions, p, args.forms, length, max_overlap, seed, args.workers)
+    elapsed = time.perf_counter() - t0
+    paths = export_forms(args.out, questions, p, forms, seed)
+
+    masks = [sum(1 << i for i in f) for f in forms]
+    worst = max((_overlap(a, b) for k, a in enumerate(masks) for b in masks[k + 1:]), default=0)
+    means = [sum(p[i] for i in f) / len(f) for f in forms]
+    print(f"Assembled {len(forms)} forms of {len(forms[0])} from {len(questions)} questions "
+          f"in {elapsed:.2f}s (seed {seed}).")
+    print(f"Mean difficulty {min(means):.3f}..{max(means):.3f} (bank {sum(p) / len(p):.3f}); "
+          f"max pairwise overlap {worst} (limit {max_overlap}).")
+    print(f"Wrote {len(paths)} bundles to {args.out}/")
+
+    bad = overlap_violations(forms, max_overlap)
+    if not bad:
+        return 0
+    print(f"\n[Assemble] WARNING: {len(bad)} form pair(s) share more than {max_overlap} questions "
+          f"after {REPAIR_ROUNDS} repair rounds:")
+    for a, b, n in bad[:20]:
+        print(f"  F{a + 1:03d} / F{b + 1:03d}: {n} shared")
+    if len(bad) > 20:
+        print(f"  ... and {len(bad) - 20} more")
+    print("Use fewer --forms, a shorter --length or a higher --max-overlap.")
+    return 1
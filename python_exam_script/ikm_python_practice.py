@@ -2,10 +2,24 @@
 from __future__ import annotations
 
 from datetime import datetime
+import argparse
+import ast
+import builtins
 import csv
+import hashlib
+import io
+import json
+import keyword
 import os
+import queue
 import random
+import shutil
+import sys
+import textwrap
+import threading
 import time
+import tokenize
+import uuid
 from dataclasses import dataclass
 from typing import List, Set, Dict, Tuple, Optional
 
@@ -20,6 +34,7 @@ TIME_LIMIT_SECONDS = 135 * 60
 LETTERS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
 
 RESULTS_CSV = "practice_results.csv"
+RESPONSES_CSV = "practice_responses.csv"
 PROGRESS_PNG = "practice_progress.png"
 
 
@@ -36,6 +51,25 @@ class Question:
         return len(self.correct) > 1
 
 
+@dataclass(frozen=True)
+class Response:
+    """One answered question within an attempt."""
+    question_id: str
+    topic: str
+    selected: Set[int]
+    n_options: int
+    is_correct: bool
+    elapsed_ms: int
+
+
+def question_id(q: Question) -> str:
+    """Stable short ID derived from the prompt and options (not bank position)."""
+    h = hashlib.sha1(q.prompt.encode("utf-8"))
+    for opt in q.options:
+        h.update(b"\0" + opt.encode("utf-8"))
+    return h.hexdigest()[:12]
+
+
 # ---------------- Utility ----------------
 
 def parse_answer(raw: str, num_options: int) -> Optional[Set[int]]:
@@ -54,14 +88,115 @@ def parse_answer(raw: str, num_options: int) -> Optional[Set[int]]:
     return chosen
 
 
-def time_left(start: float) -> int:
-    return max(0, TIME_LIMIT_SECONDS - int(time.time() - start))
+def time_left(deadline: float) -> int:
+    return max(0, int(deadline - time.monotonic()))
 
 
 def mmss(sec: int) -> str:
     return f"{sec//60:02d}:{sec%60:02d}"
 
 
+# ---------------- Timed Input ----------------
+
+class DeadlineExpired(Exception):
+    """Raised by timed_input() when the exam deadline passes mid-prompt."""
+
+
+_stdin_pending: List[str] = []
+_stdin_partial = ""
+_stdin_queue: Optional["queue.Queue[Optional[str]]"] = None
+
+
+def _use_select() -> bool:
+    if sys.platform == "win32":
+        return False
+    try:
+        sys.stdin.fileno()
+    except (AttributeError, OSError, ValueError):
+        return False
+    return True
+
+
+def _read_stdin_select(timeout: float) -> Optional[str]:
+    """Return one line from stdin, or None if nothing arrives within timeout.
+
+    Reads the raw fd so lines pasted together are not hidden inside the
+    TextIOWrapper buffer where select() cannot see them.
+    """
+    global _stdin_partial
+    import select
+
+    if _stdin_pending:
+        return _stdin_pending.pop(0)
+    fd = sys.stdin.fileno()
+    ready, _, _ = select.select([fd], [], [], timeout)
+    if not ready:
+        return None
+    chunk = os.read(fd, 4096).decode(sys.stdin.encoding or "utf-8", "replace")
+    if not chunk:
+        if _stdin_partial:
+            line, _stdin_partial = _stdin_partial, ""
+            return line
+        raise EOFError
+    *lines, _stdin_partial = (_stdin_partial + chunk).split("\n")
+    _stdin_pending.extend(lines)
+    return _stdin_pending.pop(0) if _stdin_pending else None
+
+
+def _read_stdin_thread(timeout: float) -> Optional[str]:
+    """Fallback for platforms where select() does not work on stdin (Windows)."""
+    global _stdin_queue
+    if _stdin_queue is None:
+        _stdin_queue = queue.Queue()
+
+        def pump() -> None:
+            while True:
+                line = sys.stdin.readline()
+                _stdin_queue.put(line.rstrip("\n") if line else None)
+                if not line:
+                    return
+
+        threading.Thread(target=pump, daemon=True).start()
+    try:
+        line = _stdin_queue.get(timeout=timeout)
+    except queue.Empty:
+        return None
+    if line is None:
+        raise EOFError
+    return line
+
+
+def timed_input(prompt: str, deadline: float) -> str:
+    """input() that gives up exactly at `deadline` (a time.monotonic() value).
+
+    The remaining time is shown in front of the prompt and redrawn once per
+    second on interactive terminals; between redraws the process sleeps in
+    select() (or a queue wait) rather than polling.
+    """
+    read = _read_stdin_select if _use_select() else _read_stdin_thread
+    live = sys.stdout.isatty()
+    shown = time_left(deadline)
+    sys.stdout.write(f"[{mmss(shown)}] {prompt}")
+    sys.stdout.flush()
+
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            sys.stdout.write("\n")
+            raise DeadlineExpired
+        # Wake at the next whole-second boundary so the countdown ticks evenly.
+        wait = remaining - int(remaining) or 1.0
+        line = read(min(wait, remaining) if live else remaining)
+        if line is not None:
+            return line.rstrip("\r")
+        secs = time_left(deadline)
+        if live and secs != shown:
+            shown = secs
+            # Save cursor, rewrite the fixed-width clock at column 0, restore.
+            sys.stdout.write(f"\0337\r[{mmss(shown)}]\0338")
+            sys.stdout.flush()
+
+
 # ---------------- Question Bank ----------------
 
 def bank() -> List[Question]:
@@ -831,9 +966,95 @@ def bank() -> List[Question]:
     assert len(B) == 54, f"Expected 54 questions, got {len(B)}"
     return B
 
+
+# ---------------- Bank JSON ----------------
+
+def question_to_dict(q: Question) -> dict:
+    return {
+        "topic": q.topic,
+        "prompt": q.prompt,
+        "options": list(q.options),
+        "correct": sorted(q.correct),
+        "explanations": {str(k): v for k, v in sorted(q.explanations.items())},
+    }
+
+
+def question_from_dict(d: dict) -> Question:
+    return Question(
+        prompt=d["prompt"],
+        options=list(d["options"]),
+        correct=set(d["correct"]),
+        topic=d["topic"],
+        explanations={int(k): v for k, v in d.get("explanations", {}).items()},
+    )
+
+
+def load_bank_json(path: str) -> List[Question]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [question_from_dict(d) for d in json.load(f)]
+
+
+def dump_bank_entries(entries: List[dict]) -> str:
+    """Bank JSON text: indent=2, except that "code" span arrays (see code_spans)
+    stay on one line each. Used by everything that writes a bank file."""
+    out = []
+    for d in entries:
+        code = d.get("code")
+        text = json.dumps({k: v for k, v in d.items() if k != "code"}, indent=2, ensure_ascii=False)
+        if code:
+            # Keep the span arrays on one line; indent=2 would give every number its own.
+            text = text[:-2] + ',\n  "code": ' + json.dumps(code, separators=(",", ":")) + "\n}"
+        out.append(textwrap.indent(text, "  "))
+    return "[\n" + ",\n".join(out) + "\n]\n" if out else "[]\n"
+
+
+def export_bank_json(path: str, questions: Optional[List[Question]] = None, spans: bool = False) -> None:
+    """Write the bank as JSON. With `spans`, questions containing code also get a
+    "code" entry (see code_spans) so clients can highlight without a tokenizer."""
+    questions = bank() if questions is None else questions
+    entries = []
+    for q in questions:
+        d = question_to_dict(q)
+        code = code_spans(q) if spans else None
+        if code:
+            d["code"] = code
+        entries.append(d)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(dump_bank_entries(entries))
+
+
+def load_questions(path: Optional[str]) -> List[Question]:
+    """The built-in bank when `path` is None, otherwise a JSON bank file."""
+    return bank() if path is None else load_bank_json(path)
+
 # ---------------- Logging + Charting ----------------
 
+RESULT_FIELDS = ["timestamp", "attempted", "correct", "score_pct", "duration_sec", "total_questions", "attempt_id"]
+
+
+def _upgrade_results_csv() -> None:
+    """Add the attempt_id column (empty for old rows) to a log written before it existed.
+
+    Only the header is read unless the log actually needs rewriting, so
+    appending a result stays O(1) in the size of the history.
+    """
+    with open(RESULTS_CSV, "r", newline="", encoding="utf-8") as f:
+        header = next(csv.reader(f), None)
+    if header is None or header == RESULT_FIELDS:
+        return
+    tmp = RESULTS_CSV + ".tmp"
+    with open(RESULTS_CSV, "r", newline="", encoding="utf-8") as src, \
+            open(tmp, "w", newline="", encoding="utf-8") as dst:
+        rows = csv.reader(src)
+        next(rows)
+        w = csv.writer(dst)
+        w.writerow(RESULT_FIELDS)
+        w.writerows(row + [""] for row in rows)
+    os.replace(tmp, RESULTS_CSV)
+
+
 def append_result_csv(
+    attempt_id: str,
     timestamp_iso: str,
     attempted: int,
     correct: int,
@@ -841,12 +1062,35 @@ def append_result_csv(
     duration_sec: int,
     total_questions: int,
 ) -> None:
-    file_exists = os.path.exists(RESULTS_CSV)
+    """One row per attempt; attempt_id joins it to its rows in the response log."""
+    file_exists = os.path.exists(RESULTS_CSV) and os.path.getsize(RESULTS_CSV) > 0
+    if file_exists:
+        _upgrade_results_csv()
     with open(RESULTS_CSV, "a", newline="", encoding="utf-8") as f:
         w = csv.writer(f)
         if not file_exists:
-            w.writerow(["timestamp", "attempted", "correct", "score_pct", "duration_sec", "total_questions"])
-        w.writerow([timestamp_iso, attempted, correct, f"{score_pct:.2f}", duration_sec, total_questions])
+            w.writerow(RESULT_FIELDS)
+        w.writerow([timestamp_iso, attempted, correct, f"{score_pct:.2f}", duration_sec, total_questions, attempt_id])
+
+
+RESPONSE_FIELDS = ["attempt_id", "timestamp", "form", "question_id", "topic",
+                   "selected", "n_options", "is_correct", "elapsed_ms"]
+
+
+def append_responses_csv(attempt_id: str, timestamp_iso: str, form: str, responses: List[Response]) -> None:
+    """Per-question log (one row per answered question) used by item analysis."""
+    if not responses:
+        return
+    file_exists = os.path.exists(RESPONSES_CSV)
+    with open(RESPONSES_CSV, "a", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        if not file_exists:
+            w.writerow(RESPONSE_FIELDS)
+        for r in responses:
+            w.writerow([
+                attempt_id, timestamp_iso, form, r.question_id, r.topic,
+                "".join(LETTERS[i] for i in sorted(r.selected)), r.n_options, int(r.is_correct), r.elapsed_ms,
+            ])
 
 
 def generate_progress_chart() -> None:
@@ -886,74 +1130,472 @@ def generate_progress_chart() -> None:
     print(f"\n[Chart] Wrote {PROGRESS_PNG} ({len(scores)} attempts).")
 
 
-# ---------------- Exam Engine ----------------
-
-def run_exam() -> None:
-    questions = bank()
-    random.shuffle(questions)
-    exam = questions[:TOTAL_QUESTIONS]
-
-    start = time.time()
-    correct = 0
-    attempted = 0  # ✅ FIX: track attempted properly
-
-    for i, q in enumerate(exam, 1):
-        if time_left(start) <= 0:
-            print("\nTime expired.")
-            break
-
-        print("=" * 80)
-        print(f"Q{i}/{TOTAL_QUESTIONS} | {q.topic} | Time left: {mmss(time_left(start))}\n")
-        print(q.prompt + "\n")
-
-        for idx, opt in enumerate(q.options):
-            print(f"  {LETTERS[idx]}. {opt}")
-
-        print("\nAnswer (A or A,C) or Q to quit")
-
-        while True:
-            ans = parse_answer(input("> "), len(q.options))
-            if ans is None:
-                print("Invalid input.")
-                continue
-            if -1 in ans:
-                # log + chart even if quit
-                duration_sec = int(time.time() - start)
-                score_pct = (correct / attempted) * 100.0 if attempted else 0.0
-                timestamp_iso = datetime.now().isoformat(timespec="seconds")
-                append_result_csv(timestamp_iso, attempted, correct, score_pct, duration_sec, TOTAL_QUESTIONS)
-                print("\nSaved result (quit early).")
-                print(f"{timestamp_iso} | Attempts: {attempted} | Score: {correct}/{attempted} ({score_pct:.1f}%)")
-                generate_progress_chart()
-                return
-            break
-
-        attempted += 1  # ✅ FIX: only increment once you actually answer a question
-
-        is_correct = ans == q.correct
-        print("\nCorrect!" if is_correct else "\nIncorrect.")
+# ---------------- Rendering ----------------
+
+ANSI = {
+    "keyword": "\033[35m",
+    "builtin": "\033[34m",
+    "string": "\033[32m",
+    "number": "\033[36m",
+    "comment": "\033[90m",
+}
+ANSI_RESET = "\033[0m"
+_BUILTINS = frozenset(dir(builtins))
+
+
+def code_token_spans(code: str) -> List[Tuple[int, int, str]]:
+    """(start, end, kind) character spans for the highlightable tokens in `code`.
+
+    Uses the stdlib tokenizer; snippets that stop being valid Python part way
+    through keep the spans found up to that point.
+    """
+    line_starts = [0]
+    for line in code.splitlines(keepends=True):
+        line_starts.append(line_starts[-1] + len(line))
+
+    spans: List[Tuple[int, int, str]] = []
+    try:
+        for tok in tokenize.generate_tokens(io.StringIO(code).readline):
+            if tok.type == tokenize.NAME:
+                kind = "keyword" if keyword.iskeyword(tok.string) else "builtin" if tok.string in _BUILTINS else ""
+            else:
+                kind = {tokenize.STRING: "string", tokenize.NUMBER: "number", tokenize.COMMENT: "comment"}.get(tok.type, "")
+            if kind:
+                start = line_starts[tok.start[0] - 1] + tok.start[1]
+                end = line_starts[tok.end[0] - 1] + tok.end[1]
+                spans.append((start, end, kind))
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        pass
+    return spans
+
+
+def _is_code(block: str) -> bool:
+    """Parses as Python and is more than bare names/literals (which prose like
+    "TypeError" or an output listing would also pass)."""
+    try:
+        tree = ast.parse(block)
+    except (SyntaxError, ValueError):
+        return False
+    return any(not (isinstance(s, ast.Expr) and isinstance(s.value, (ast.Name, ast.Constant))) for s in tree.body)
+
+
+def code_blocks(text: str, multiline_only: bool = False) -> List[Tuple[int, int]]:
+    """(start, end) ranges of the Python code in `text`.
+
+    Text is split on blank lines and each block is classified on its own, so
+    prose before, between and after snippets stays prose. A block that only
+    parses together with the code block before it (e.g. a function body with a
+    blank line in it) is merged into that block.
+    """
+    blocks: List[Tuple[int, int]] = []
+    pos, prev_code = 0, False
+    for part in text.split("\n\n"):
+        start, end = pos, pos + len(part)
+        pos = end + 2
+        if prev_code and _is_code(text[blocks[-1][0]:end]):
+            blocks[-1] = (blocks[-1][0], end)
+        elif part.strip() and _is_code(part) and (not multiline_only or "\n" in part.strip()):
+            blocks.append((start, end))
+            prev_code = True
+        else:
+            prev_code = False
+    return blocks
+
+
+# Index order of the kinds in exported span arrays; web/src/App.jsx mirrors it.
+TOKEN_KINDS = ("keyword", "builtin", "string", "number", "comment")
+
+
+def _utf16_offsets(text: str) -> Optional[List[int]]:
+    """Map code point offsets to UTF-16 offsets (how JavaScript indexes strings);
+    None when the two agree."""
+    if all(ord(ch) <= 0xFFFF for ch in text):
+        return None
+    out, n = [], 0
+    for ch in text:
+        out.append(n)
+        n += 2 if ord(ch) > 0xFFFF else 1
+    out.append(n)
+    return out
+
+
+def _flat_spans(text: str, start: int, end: int) -> List[int]:
+    """[start, end, s0, e0, k0, s1, e1, k1, ...]: the block's range in `text`, then
+    its token spans relative to the block start with kinds as TOKEN_KINDS indexes."""
+    js = _utf16_offsets(text)
+    at = (lambda i: js[i]) if js else (lambda i: i)
+    flat = [at(start), at(end)]
+    for s, e, kind in code_token_spans(text[start:end]):
+        flat += [at(start + s) - at(start), at(start + e) - at(start), TOKEN_KINDS.index(kind)]
+    return flat
+
+
+def code_spans(q: Question) -> dict:
+    """Precomputed highlighting for the web app:
+    {"prompt": [block, ...], "options": {"<index>": [block, ...]}} with each
+    block as from _flat_spans. Options count as code only when multi-line, so
+    one-line answers like "[1, 2]" keep the normal option style. Empty when
+    the question has no code.
+    """
+    out: dict = {}
+    prompt = [_flat_spans(q.prompt, s, e) for s, e in code_blocks(q.prompt)]
+    if prompt:
+        out["prompt"] = prompt
+    options = {}
+    for i, opt in enumerate(q.options):
+        blocks = [_flat_spans(opt, s, e) for s, e in code_blocks(opt, multiline_only=True)]
+        if blocks:
+            options[str(i)] = blocks
+    if options:
+        out["options"] = options
+    return out
+
+
+def highlight(code: str) -> str:
+    out, pos = [], 0
+    for start, end, kind in code_token_spans(code):
+        out.append(code[pos:start])
+        out.append(ANSI[kind] + code[start:end] + ANSI_RESET)
+        pos = end
+    out.append(code[pos:])
+    return "".join(out)
+
+
+class TerminalRenderer:
+    """Formats each question's screen and explanation block once and writes
+    each screen with a single buffered write.
+
+    width:  wrap prose, options and explanations to this many columns (code is
+            never wrapped); None keeps lines as authored.
+    color:  ANSI-highlight code in prompts (tokenized once per question).
+    """
+
+    def __init__(self, width: Optional[int] = None, color: bool = False, out=None) -> None:
+        self.width = width
+        self.color = color
+        self.out = out or sys.stdout
+        self._bodies: Dict[Tuple[str, Tuple[str, ...]], str] = {}
+        self._explanations: Dict[Tuple[str, Tuple[str, ...]], str] = {}
+
+    def _wrap(self, text: str, indent: str = "", hang: str = "") -> str:
+        if not self.width:
+            return indent + text
+        return "\n".join(
+            textwrap.fill(line, self.width, initial_indent=indent, subsequent_indent=hang) if line else ""
+            for line in text.split("\n")
+        )
+
+    def _body(self, q: Question) -> str:
+        key = (q.prompt, tuple(q.options))
+        body = self._bodies.get(key)
+        if body is None:
+            parts, pos = [], 0
+            for start, end in code_blocks(q.prompt):
+                code = q.prompt[start:end]
+                parts.append(self._wrap(q.prompt[pos:start]))
+                parts.append(highlight(code) if self.color else code)
+                pos = end
+            parts.append(self._wrap(q.prompt[pos:]) + "\n\n")
+            for idx, opt in enumerate(q.options):
+                parts.append(self._wrap(f"{LETTERS[idx]}. {opt}", "  ", "     ") + "\n")
+            parts.append("\nAnswer (A or A,C) or Q to quit\n")
+            body = self._bodies[key] = "".join(parts)
+        return body
+
+    def _explanation(self, q: Question) -> str:
+        key = (q.prompt, tuple(q.options))
+        block = self._explanations.get(key)
+        if block is None:
+            parts = ["\nExplanation:\n"]
+            for idx, opt in enumerate(q.options):
+                status = "CORRECT" if idx in q.correct else "WRONG"
+                parts.append(self._wrap(f"{LETTERS[idx]}. {opt}", "  ", "     ") + "\n")
+                note = q.explanations.get(idx, "No explanation provided.")
+                parts.append(self._wrap(f"{status}: {note}", "     ", "     ") + "\n")
+            block = self._explanations[key] = "".join(parts)
+        return block
+
+    def question(self, q: Question, number: int, total: int, secs_left: int) -> None:
+        rule = "=" * min(80, self.width or 80)
+        header = f"{rule}\nQ{number}/{total} | {q.topic} | Time left: {mmss(secs_left)}\n\n"
+        self.out.write(header + self._body(q))
+        self.out.flush()
+
+    def feedback(self, q: Question, is_correct: bool) -> None:
+        self.out.write(("\nCorrect!\n" if is_correct else "\nIncorrect.\n") + self._explanation(q))
+        self.out.flush()
 
-        if is_correct:
-            correct += 1
 
-        print("\nExplanation:")
-        for idx, opt in enumerate(q.options):
-            status = "CORRECT" if idx in q.correct else "WRONG"
-            print(f"  {LETTERS[idx]}. {opt}")
-            print(f"     {status}: {q.explanations.get(idx, 'No explanation provided.')}")
+# ---------------- Exam Engine ----------------
 
-    # ----- end of run -----
-    duration_sec = int(time.time() - start)
+def finish_exam(
+    attempted: int,
+    correct: int,
+    duration_sec: int,
+    total_questions: int,
+    responses: List[Response],
+    note: str = "",
+    form: str = "",
+) -> None:
     score_pct = (correct / attempted) * 100.0 if attempted else 0.0
     timestamp_iso = datetime.now().isoformat(timespec="seconds")
 
-    append_result_csv(timestamp_iso, attempted, correct, score_pct, duration_sec, TOTAL_QUESTIONS)
-    print("\nResult Log Entry:")
+    attempt_id = uuid.uuid4().hex[:12]
+    append_result_csv(attempt_id, timestamp_iso, attempted, correct, score_pct, duration_sec, total_questions)
+    append_responses_csv(attempt_id, timestamp_iso, form, responses)
+    print(f"\nResult Log Entry{note}:")
     print(f"{timestamp_iso} | Attempts: {attempted} | Score: {correct}/{attempted} ({score_pct:.1f}%) | Duration: {duration_sec}s")
     print("\nFinal Score:", correct, "/", attempted if attempted else 0)
 
+    import percentile_sketch
+    try:
+        ranks = percentile_sketch.rank_attempt(responses, form)
+    except (OSError, ValueError) as e:
+        print(f"\n[Percentile] Ranking skipped: {e}")
+        ranks = {}
+    if "overall" in ranks:
+        line = f"Percentile: {percentile_sketch.rank_label(ranks['overall'])} of past attempts"
+        if "form:" + form in ranks:
+            line += f" ({form}: {percentile_sketch.rank_label(ranks['form:' + form])})"
+        print(line)
+        topics = [f"{k[6:]} {percentile_sketch.rank_label(v)}" for k, v in ranks.items() if k.startswith("topic:")]
+        if topics:
+            print("By topic:", ", ".join(topics))
+
     generate_progress_chart()
 
 
+class ExamSession:
+    """Exam state shared by the interactive CLI and headless drivers.
+
+    `clock` returns seconds (time.monotonic by default); headless drivers pass
+    a virtual clock so runs are reproducible.
+    """
+
+    def __init__(self, questions: List[Question], form: str = "", clock=time.monotonic) -> None:
+        self.exam = questions
+        self.form = form
+        self.clock = clock
+        self.start = clock()
+        self.deadline = self.start + TIME_LIMIT_SECONDS
+        self.index = 0
+        self.correct = 0
+        self.attempted = 0
+        self.responses: List[Response] = []
+        self.shown_at = self.start
+
+    def current(self) -> Optional[Question]:
+        return self.exam[self.index] if self.index < len(self.exam) else None
+
+    def show(self) -> Question:
+        """Mark the current question as displayed (starts its latency clock)."""
+        self.shown_at = self.clock()
+        return self.exam[self.index]
+
+    def submit(self, ans: Set[int]) -> bool:
+        q = self.exam[self.index]
+        is_correct = ans == q.correct
+        self.attempted += 1
+        if is_correct:
+            self.correct += 1
+        self.responses.append(Response(
+            question_id(q), q.topic, ans, len(q.options), is_correct,
+            int((self.clock() - self.shown_at) * 1000),
+        ))
+        self.index += 1
+        return is_correct
+
+    def duration_sec(self) -> int:
+        return int(min(self.clock(), self.deadline) - self.start)
+
+
+def run_exam(
+    questions: Optional[List[Question]] = None,
+    form: str = "",
+    renderer: Optional[TerminalRenderer] = None,
+) -> None:
+    renderer = renderer or TerminalRenderer()
+    if questions is None:
+        questions = bank()
+        random.shuffle(questions)
+        questions = questions[:TOTAL_QUESTIONS]
+    session = ExamSession(questions, form)
+
+    try:
+        while session.current() is not None:
+            q = session.show()
+            renderer.question(q, session.index + 1, len(session.exam), time_left(session.deadline))
+
+            while True:
+                ans = parse_answer(timed_input("> ", session.deadline), len(q.options))
+                if ans is None:
+                    print("Invalid input.")
+                    continue
+                if -1 in ans:
+                    # log + chart even if quit
+                    finish_exam(session.attempted, session.correct, session.duration_sec(), len(session.exam),
+                                session.responses, " (quit early)", form)
+                    return
+                break
+
+            renderer.feedback(q, session.submit(ans))
+    except DeadlineExpired:
+        print("\nTime expired.")
+
+    # ----- end of run -----
+    finish_exam(session.attempted, session.correct, session.duration_sec(), len(session.exam),
+                session.responses, form=form)
+
+
+# ---------------- CLI ----------------
+
+def _positive_int(text: str) -> int:
+    n = int(text)
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {n}")
+    return n
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    ap = argparse.ArgumentParser(description="Python 3 IKM-style practice exam.")
+    sub = ap.add_subparsers(dest="command")
+
+    p = sub.add_parser("exam", help="Run the timed practice exam (default).")
+    p.add_argument("--templates", action="store_true", help="Use freshly generated template variants")
+    p.add_argument("--seed", type=int, help="Seed for --templates (reproducible exam)")
+    p.add_argument("--form", help="Frozen form bundle from `assemble`")
+    p.add_argument("--bank", help="JSON bank file for --form (default: built-in bank)")
+    p.add_argument("--width", type=int, help="Wrap text to N columns (0 = terminal width)")
+    p.add_argument("--color", action="store_true", help="Syntax-highlight code in prompts")
+
+    p = sub.add_parser("export", help="Write the question bank as JSON for the web app.")
+    p.add_argument("path", help="Output JSON file, e.g. web/public/questions.json")
+    p.add_argument("--bank", help="JSON bank to re-export (default: built-in bank)")
+    p.add_argument("--no-spans", action="store_true", help="Omit the precomputed code highlighting spans")
+
+    p = sub.add_parser("search", help="Full-text search over the question bank.")
+    p.add_argument("query", nargs="+", help="Terms; supports OR, NOT term and topic:Name")
+    p.add_argument("--bank", help="JSON bank file (default: built-in bank)")
+    p.add_argument("--limit", type=int, default=10)
+    p.add_argument("--rebuild", action="store_true", help="Ignore any persisted index")
+
+    p = sub.add_parser("validate", help="Check the question bank for structural errors.")
+    p.add_argument("--bank", help="JSON bank file (default: built-in bank)")
+    p.add_argument("--json", action="store_true", help="Emit one JSON object per issue")
+    p.add_argument("--workers", type=int, help="Worker processes for large banks")
+    p.add_argument("--cache", default=".bank_validation_cache.json", help="Verdict cache file")
+    p.add_argument("--no-cache", action="store_true")
+
+    p = sub.add_parser("templates", help="Generate or inspect template question variants.")
+    p.add_argument("--seed", type=int, help="Exam seed (default: random)")
+    p.add_argument("--count", type=int, default=TOTAL_QUESTIONS)
+    p.add_argument("--show", metavar="NAME@SEED", help="Print one variant with its answer")
+    p.add_argument("--check", type=int, metavar="SEEDS", help="Run each template's code for SEEDS seeds and check the answer keys")
+
+    p = sub.add_parser("analyze", help="Item statistics from the per-response log (needs numpy).")
+    p.add_argument("--responses", default=RESPONSES_CSV, help="Per-response CSV log or columnar directory")
+    p.add_argument("--out", default="item_stats.json", help="Where to write per-question stats")
+    p.add_argument("--update-bank", metavar="BANK_JSON", help="Also embed item_stats into this JSON bank")
+    p.add_argument("--all", action="store_true", help="List every item, not just flagged ones")
+
+    p = sub.add_parser("assemble", help="Build balanced parallel exam forms.")
+    p.add_argument("--bank", help="JSON bank file (default: built-in bank)")
+    p.add_argument("--forms", type=_positive_int, default=10, help="Number of forms")
+    p.add_argument("--length", type=_positive_int, default=TOTAL_QUESTIONS, help="Questions per form")
+    p.add_argument("--max-overlap", type=int, help="Max questions shared by two forms (default: ~1.5x random overlap)")
+    p.add_argument("--stats", default="item_stats.json", help="Item statistics for difficulty")
+    p.add_argument("--seed", type=int)
+    p.add_argument("--workers", type=int)
+    p.add_argument("--out", default="forms", help="Output directory for form bundles")
+
+    p = sub.add_parser("collusion", help="Flag attempts with suspiciously similar answers.")
+    p.add_argument("--responses", default=RESPONSES_CSV, help="Per-response CSV log")
+    p.add_argument("--threshold", type=float, default=0.6, help="Wrong-answer Jaccard similarity")
+    p.add_argument("--seed", type=int, default=0, help="MinHash seed")
+    p.add_argument("--limit", type=int, default=50, help="Pairs to print")
+    p.add_argument("--csv", help="Also write all flagged pairs to this CSV")
+
+    p = sub.add_parser("columnar", help="Convert result/response CSVs to typed columnar files (needs numpy).")
+    p.add_argument("--results", default=RESULTS_CSV)
+    p.add_argument("--responses", default=RESPONSES_CSV)
+    p.add_argument("--out", default="analytics", help="Output directory")
+    p.add_argument("--format", choices=["npy", "arrow"], default="npy", help="arrow needs pyarrow")
+
+    p = sub.add_parser("watch", help="Keep a JSON bank loaded and hot-reload it on change.")
+    p.add_argument("bank", help="JSON bank file")
+    p.add_argument("--interval", type=float, default=1.0, help="Polling interval in seconds")
+
+    p = sub.add_parser("loadgen", help="Drive the engine with synthetic candidates, or replay a run.")
+    p.add_argument("--bank", help="JSON bank file (default: built-in bank)")
+    p.add_argument("--candidates", type=int, default=1000)
+    p.add_argument("--profiles", help="JSON list of candidate profiles")
+    p.add_argument("--seed", type=int)
+    p.add_argument("--log", help="Write a replay log (JSON lines) here")
+    p.add_argument("--replay", metavar="LOG", help="Replay a recorded run instead of generating one")
+    p.add_argument("--persist", action="store_true", help="Log completed exams to the results and response CSVs and the percentile sketches")
+
+    p = sub.add_parser("percentile", help="Percentile rank of a score from the streaming score sketches.")
+    p.add_argument("score", type=float, nargs="?", help="Score %% to rank (omit for a summary)")
+    p.add_argument("--topic", help="Rank against this topic's scores")
+    p.add_argument("--form", help="Rank against this form's scores")
+    p.add_argument("--sketch", default="practice_percentiles.json", help="Sketch file")
+    p.add_argument("--merge", nargs="+", metavar="SKETCH", help="Merge sketch files from other machines into --sketch")
+    p.add_argument("--rebuild", action="store_true", help="Rebuild --sketch from the response log")
+    p.add_argument("--responses", default=RESPONSES_CSV)
+
+    args = ap.parse_args(argv)
+
+    if args.command is None:
+        run_exam()
+    elif args.command == "exam":
+        width = shutil.get_terminal_size().columns if args.width == 0 else args.width
+        renderer = TerminalRenderer(width=width, color=args.color)
+        if args.templates:
+            import question_templates
+            seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+            print(f"Template exam seed: {seed}")
+            run_exam([q for _, q in question_templates.generate_exam(seed)],
+                     form=question_templates.exam_form(seed), renderer=renderer)
+        elif args.form:
+            import form_assembler
+            form_id, questions = form_assembler.load_form(args.form, load_questions(args.bank))
+            run_exam(questions, form=form_id, renderer=renderer)
+        else:
+            run_exam(renderer=renderer)
+    elif args.command == "export":
+        export_bank_json(args.path, load_questions(args.bank), spans=not args.no_spans)
+        print(f"Wrote {args.path}")
+    elif args.command == "search":
+        import search_index
+        search_index.cli(args)
+    elif args.command == "validate":
+        import bank_validator
+        sys.exit(bank_validator.cli(args))
+    elif args.command == "templates":
+        import question_templates
+        sys.exit(question_templates.cli(args))
+    elif args.command == "analyze":
+        import item_analysis
+        item_analysis.cli(args)
+    elif args.command == "assemble":
+        import form_assembler
+        sys.exit(form_assembler.cli(args))
+    elif args.command == "collusion":
+        import collusion
+        collusion.cli(args)
+    elif args.command == "columnar":
+        import columnar_store
+        columnar_store.cli(args)
+    elif args.command == "watch":
+        import bank_manager
+        bank_manager.cli(args)
+    elif args.command == "loadgen":
+        import load_generator
+        load_generator.cli(args)
+    elif args.command == "percentile":
+        import percentile_sketch
+        percentile_sketch.cli(args)
+
+
 if __name__ == "__main__":
-    run_exam()
\ No newline at end of file
+    main()
\ No newline at end of file
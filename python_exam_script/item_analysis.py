@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""Classical item analysis over the per-response log.
+
+Streams practice_responses.csv (or memory-maps a columnar export of it, see
+columnar_store) into flat NumPy arrays, one entry per response, and computes
+in vectorized passes:
+
+- p-value (proportion correct) per question
+- point-biserial discrimination: correlation of an item with the rest score
+- selection rate of every option per question
+- KR-20 reliability per exam form
+
+Weak items are flagged and written to a sidecar JSON keyed by question ID,
+and optionally embedded into a JSON bank as "item_stats".
+"""
+from __future__ import annotations
+
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from ikm_python_practice import LETTERS, RESPONSES_CSV, dump_bank_entries, question_from_dict, question_id
+
+# Optional (pip install numpy)
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+ITEM_STATS_JSON = "item_stats.json"
+
+# Flagging thresholds
+MIN_RESPONSES = 30          # fewer than this and the statistics are noise
+P_TOO_HARD = 0.20
+P_TOO_EASY = 0.95
+MIN_DISCRIMINATION = 0.15
+MIN_DISTRACTOR_RATE = 0.05  # a distractor nobody picks is not doing its job
+
+
+@dataclass
+class ResponseArrays:
+    """Column arrays, one entry per response, with string columns dictionary-encoded."""
+    attempt: "np.ndarray"      # int32 code into attempt_ids
+    question: "np.ndarray"     # int32 code into question_ids
+    form: "np.ndarray"         # int32 code into forms
+    selected: "np.ndarray"     # uint32 bitmask of chosen options (bit i = LETTERS[i])
+    n_options: "np.ndarray"    # uint8
+    correct: "np.ndarray"      # uint8 0/1
+    attempt_ids: List[str]
+    question_ids: List[str]
+    forms: List[str]
+
+
+def letters_to_mask(s: str) -> int:
+    mask = 0
+    for ch in s:
+        mask |= 1 << LETTERS.index(ch)
+    return mask
+
+
+def _from_columns(cols: Dict[str, "np.ndarray"], dicts: Dict[str, List[str]]) -> ResponseArrays:
+    lut = np.array([letters_to_mask(s) for s in dicts["selected"]], dtype=np.uint32)
+    return ResponseArrays(
+        attempt=cols["attempt"],
+        question=cols["question"],
+        form=cols["form"],
+        selected=lut[cols["selected"]],
+        n_options=cols["n_options"],
+        correct=cols["correct"],
+        attempt_ids=dicts["attempt"],
+        question_ids=dicts["question"],
+        forms=dicts["form"],
+    )
+
+
+def load_responses_csv(path: str = RESPONSES_CSV) -> ResponseArrays:
+    """Stream the CSV into typed arrays (via columnar_store's parser)."""
+    from columnar_store import read_responses_csv
+
+    return _from_columns(*read_responses_csv(path))
+
+
+def load_responses_columnar(path: str) -> ResponseArrays:
+    """Memory-mapped columns written by `columnar` (npy format); no parsing."""
+    from columnar_store import load_meta, load_npy
+
+    return _from_columns(load_npy(path, "responses"), load_meta(path)["dictionaries"])
+
+
+# ---------------- Statistics ----------------
+
+def item_statistics(R: ResponseArrays) -> Dict[str, "np.ndarray"]:
+    """Per-question arrays indexed by question code."""
+    nq = len(R.question_ids)
+    q = R.question
+    x = R.correct.astype(np.float64)
+
+    n = np.bincount(q, minlength=nq).astype(np.float64)
+    sx = np.bincount(q, weights=x, minlength=nq)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        p = sx / n
+
+    # Point-biserial against the rest score (total minus this item) so an
+    # item is not correlated with itself.
+    totals = np.bincount(R.attempt, weights=x, minlength=len(R.attempt_ids))
+    y = totals[R.attempt] - x
+    sy = np.bincount(q, weights=y, minlength=nq)
+    sxy = np.bincount(q, weights=x * y, minlength=nq)
+    syy = np.bincount(q, weights=y * y, minlength=nq)
+    cov = n * sxy - sx * sy
+    var_x = n * sx - sx * sx          # x*x == x for 0/1
+    var_y = n * syy - sy * sy
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r_pb = cov / np.sqrt(var_x * var_y)
+
+    k = int(R.n_options.max()) if len(R.n_options) else 0
+    rates = np.zeros((nq, k))
+    for b in range(k):
+        picked = ((R.selected >> b) & 1).astype(np.float64)
+        rates[:, b] = np.bincount(q, weights=picked, minlength=nq)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rates /= n[:, None]
+
+    # Answer key recovered from the log itself: the selection on any correct response.
+    key = np.zeros(nq, dtype=np.uint32)
+    hit = R.correct == 1
+    np.maximum.at(key, q[hit], R.selected[hit])
+    n_opts = np.zeros(nq, dtype=np.uint8)
+    np.maximum.at(n_opts, q, R.n_options)
+
+    return {"n": n, "p": p, "r_pb": r_pb, "rates": rates, "key": key, "n_options": n_opts}
+
+
+def kr20_by_form(R: ResponseArrays) -> Dict[str, Optional[float]]:
+    """KR-20 per form. Unassigned ("" form) attempts each see a different
+    random question set, so reliability is undefined for them."""
+    out: Dict[str, Optional[float]] = {}
+    for code, form in enumerate(R.forms):
+        if not form:
+            out[form] = None
+            continue
+        m = R.form == code
+        q = R.question[m]
+        x = R.correct[m].astype(np.float64)
+        items, qi = np.unique(q, return_inverse=True)
+        k = len(items)
+        _, ai = np.unique(R.attempt[m], return_inverse=True)
+        totals = np.bincount(ai, weights=x)
+        p = np.bincount(qi, weights=x) / np.bincount(qi)
+        var = totals.var()
+        out[form] = None if k < 2 or var == 0 else float(k / (k - 1) * (1 - np.sum(p * (1 - p)) / var))
+    return out
+
+
+def flag_items(stats: Dict[str, "np.ndarray"]) -> List[List[str]]:
+    flags: List[List[str]] = []
+    for i in range(len(stats["n"])):
+        f: List[str] = []
+        if stats["n"][i] < MIN_RESPONSES:
+            flags.append(f)
+            continue
+        p, r = stats["p"][i], stats["r_pb"][i]
+        if p < P_TOO_HARD:
+            f.append("too-hard")
+        if p > P_TOO_EASY:
+            f.append("too-easy")
+        if not np.isnan(r) and r < MIN_DISCRIMINATION:
+            f.append("negative-discrimination" if r < 0 else "low-discrimination")
+        key = int(stats["key"][i])
+        for b in range(int(stats["n_options"][i])):
+            if not key >> b & 1 and stats["rates"][i, b] < MIN_DISTRACTOR_RATE:
+                f.append(f"weak-distractor-{LETTERS[b]}")
+        flags.append(f)
+    return flags
+
+
+def _finite(v: float) -> Optional[float]:
+    return None if np.isnan(v) else round(float(v), 4)
+
+
+def stats_by_question_id(R: ResponseArrays, stats: Dict[str, "np.ndarray"], flags: List[List[str]]) -> Dict[str, dict]:
+    out = {}
+    for i, qid in enumerate(R.question_ids):
+        k = int(stats["n_options"][i])
+        out[qid] = {
+            "n": int(stats["n"][i]),
+            "p": _finite(stats["p"][i]),
+            "r_pb": _finite(stats["r_pb"][i]),
+            "option_rates": {LETTERS[b]: _finite(stats["rates"][i, b]) for b in range(k)},
+            "flags": flags[i],
+        }
+    return out
+
+
+def update_bank_json(path: str, by_qid: Dict[str, dict]) -> int:
+    """Embed "item_stats" into matching entries of a JSON bank; returns entries updated.
+
+    Meant for authoring banks: the stats are not needed by the web app, so
+    re-export the shipped bank from the authoring one rather than updating it.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    updated = 0
+    for d in entries:
+        s = by_qid.get(question_id(question_from_dict(d)))
+        if s is not None:
+            d["item_stats"] = s
+            updated += 1
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(dump_bank_entries(entries))
+    os.replace(tmp, path)
+    return updated
+
+
+# ---------------- CLI ----------------
+
+def cli(args) -> None:
+    if np is None:
+        print("[Analyze] numpy not available. Install it with: pip install numpy")
+        return
+    if not os.path.exists(args.responses):
+        print(f"[Analyze] No response log found at {args.responses}.")
+        return
+
+    t0 = time.perf_counter()
+    if os.path.isdir(args.responses):
+        R = load_responses_columnar(args.responses)
+    else:
+        R = load_responses_csv(args.responses)
+    t1 = time.perf_counter()
+    stats = item_statistics(R)
+    reliability = kr20_by_form(R)
+    flags = flag_items(stats)
+    t2 = time.perf_counter()
+
+    print(f"{len(R.correct)} responses, {len(R.attempt_ids)} attempts, {len(R.question_ids)} questions "
+          f"(load {t1 - t0:.2f}s, analyze {t2 - t1:.2f}s)\n")
+
+    print(f"{'question':<14}{'n':>7}{'p':>7}{'r_pb':>7}  flags")
+    for i in np.argsort(stats["p"]):
+        if flags[i] or args.all:
+            r = stats["r_pb"][i]
+            print(f"{R.question_ids[i]:<14}{int(stats['n'][i]):>7}{stats['p'][i]:>7.2f}"
+                  f"{'   n/a' if np.isnan(r) else f'{r:>7.2f}'}  {', '.join(flags[i])}")
+
+    print("\nKR-20 by form:")
+    for form, kr in reliability.items():
+        print(f"  {form or '(random exams)':<20} {'n/a' if kr is None else f'{kr:.3f}'}")
+
+    by_qid = stats_by_question_id(R, stats, flags)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(by_qid, f, indent=2)
+    print(f"\nWrote {args.out}")
+    if args.update_bank:
+        n = update_bank_json(args.update_bank, by_qid)
+        print(f"Updated item_stats on {n} question(s) in {args.update_bank}")
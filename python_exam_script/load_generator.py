@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""Synthetic candidate load generator and deterministic replay harness.
+
+Spawns N synthetic candidates and drives ExamSession headlessly, in process.
+Candidates sit their exams concurrently in *virtual* time: a heap orders
+every candidate's next answer by when it would arrive, so interleaving is
+realistic but the run needs no sleeping and is fully determined by its seed.
+
+Each candidate follows a profile: a base accuracy, per-topic accuracy
+overrides, and a log-normal think time. Every answer is recorded to a JSON
+lines replay log. The first line is a header with the seed and config, and
+each later line is one answer event.
+
+`replay` regenerates the load from the header's seed, checks it is identical
+to the recorded events, and re-drives the engine. Any grading that differs
+from the recording is reported, which is what an A/B of an engine change
+needs.
+
+Metrics: wall-clock throughput, per-submit engine latency percentiles,
+simulated think-time percentiles, and peak RSS.
+"""
+from __future__ import annotations
+
+import heapq
+import json
+import math
+import random
+import sys
+import time
+from datetime import datetime
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import percentile_sketch
+from ikm_python_practice import (
+    LETTERS, TOTAL_QUESTIONS, ExamSession, Question, append_responses_csv, append_result_csv, load_questions,
+    question_id,
+)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+@dataclass(frozen=True)
+class CandidateProfile:
+    name: str
+    accuracy: float                          # probability of answering correctly
+    think_ms: float                          # median think time per question
+    think_sigma: float = 0.6                 # log-normal spread
+    topic_accuracy: Dict[str, float] = field(default_factory=dict)
+    weight: float = 1.0                      # share of the candidate population
+
+
+DEFAULT_PROFILES = [
+    CandidateProfile("novice", 0.45, 90_000, topic_accuracy={"Basics": 0.65}, weight=3),
+    CandidateProfile("average", 0.65, 70_000, weight=5),
+    CandidateProfile("expert", 0.88, 45_000, think_sigma=0.4, weight=2),
+]
+
+
+def load_profiles(path: Optional[str]) -> List[CandidateProfile]:
+    if not path:
+        return DEFAULT_PROFILES
+    with open(path, "r", encoding="utf-8") as f:
+        return [CandidateProfile(**d) for d in json.load(f)]
+
+
+# ---------------- Simulation ----------------
+
+class _VirtualClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _pick_answer(q: Question, p: CandidateProfile, rng: random.Random) -> Set[int]:
+    acc = p.topic_accuracy.get(q.topic, p.accuracy)
+    if rng.random() < acc:
+        return set(q.correct)
+    wrong = [i for i in range(len(q.options)) if i not in q.correct]
+    if not wrong or (q.multi_select and rng.random() < 0.5):
+        # Partially right multi-select: drop one correct option.
+        return set(sorted(q.correct)[1:]) or {0}
+    return {rng.choice(wrong)}
+
+
+def generate_events(
+    questions: List[Question], n_candidates: int, profiles: List[CandidateProfile], seed: int
+) -> Iterator[Tuple[float, int, Question, Set[int], ExamSession]]:
+    """Yield (virtual seconds, candidate, question, answer, session) in arrival order.
+
+    All randomness comes from per-candidate RNGs seeded from `seed`, so the
+    stream depends only on the seed, the bank and the profiles.
+    """
+    master = random.Random(seed)
+    weights = [p.weight for p in profiles]
+    clock = _VirtualClock()
+    sessions: List[ExamSession] = []
+    cand_profiles: List[CandidateProfile] = []
+    rngs: List[random.Random] = []
+    heap: List[Tuple[float, int]] = []
+
+    def schedule(c: int, now: float) -> None:
+        """Show candidate c its next question at `now` and queue the answer."""
+        p = cand_profiles[c]
+        clock.now = now
+        sessions[c].show()
+        think = rngs[c].lognormvariate(math.log(p.think_ms), p.think_sigma) / 1000
+        heapq.heappush(heap, (now + think, c))
+
+    for c in range(n_candidates):
+        rng = random.Random(master.getrandbits(64))
+        cand_profiles.append(rng.choices(profiles, weights)[0])
+        rngs.append(rng)
+        order = questions[:]
+        rng.shuffle(order)
+        order = order[:TOTAL_QUESTIONS]
+        arrival = rng.uniform(0, 600)      # candidates trickle in over ten minutes
+        clock.now = arrival
+        sessions.append(ExamSession(order, form="loadgen", clock=clock))
+        schedule(c, arrival)
+
+    while heap:
+        t, c = heapq.heappop(heap)
+        s = sessions[c]
+        if t >= s.deadline:
+            continue                        # ran out of time mid-question
+        clock.now = t
+        q = s.current()
+        yield t, c, q, _pick_answer(q, cand_profiles[c], rngs[c]), s
+        if s.current() is not None:
+            schedule(c, t)
+
+
+def _percentiles(values: List[float], ps=(50, 90, 95, 99)) -> Dict[str, float]:
+    if not values:
+        return {}
+    v = sorted(values)
+    return {f"p{p}": v[min(len(v) - 1, int(math.ceil(p / 100 * len(v))) - 1)] for p in ps}
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return rss / 1024 / (1024 if sys.platform == "darwin" else 1)
+
+
+def run_load(
+    questions: List[Question],
+    n_candidates: int,
+    profiles: List[CandidateProfile],
+    seed: int,
+    log_path: Optional[str] = None,
+    recorded: Optional[Iterator[dict]] = None,
+    persist: bool = False,
+) -> dict:
+    """Drive the engine with synthetic load; optionally write or check a replay log."""
+    log = open(log_path, "w", encoding="utf-8") if log_path else None
+    if log:
+        log.write(json.dumps({
+            "type": "run", "seed": seed, "candidates": n_candidates,
+            "profiles": [asdict(p) for p in profiles],
+            "bank": sorted(question_id(q) for q in questions),
+        }) + "\n")
+
+    submit_us: List[float] = []
+    think_ms: List[float] = []
+    last_shown: Dict[int, float] = {}
+    mismatches: List[str] = []
+    events = 0
+    finished: Dict[int, ExamSession] = {}
+    t0 = time.perf_counter()
+
+    for vt, c, q, ans, session in generate_events(questions, n_candidates, profiles, seed):
+        qid = question_id(q)
+        letters = "".join(LETTERS[i] for i in sorted(ans))
+        if recorded is not None:
+            rec = next(recorded, None)
+            if not isinstance(rec, dict) or (rec.get("c"), rec.get("q"), rec.get("a")) != (c, qid, letters):
+                raise ValueError(f"event {events}: load diverged from the recording "
+                                 f"(got c={c} q={qid} a={letters}, recorded {rec})")
+
+        t = time.perf_counter()
+        ok = session.submit(ans)
+        submit_us.append((time.perf_counter() - t) * 1e6)
+        think_ms.append(session.responses[-1].elapsed_ms)
+        last_shown[c] = vt
+        events += 1
+
+        if recorded is not None and int(ok) != rec.get("ok"):
+            mismatches.append(f"c={c} q={qid} a={letters}: recorded ok={rec.get('ok')}, now ok={int(ok)}")
+        if log:
+            log.write(json.dumps({"t": round(vt, 3), "c": c, "q": qid, "a": letters, "ok": int(ok)}) + "\n")
+        if session.current() is None:
+            finished[c] = session
+
+    wall = time.perf_counter() - t0
+    if log:
+        log.close()
+    if recorded is not None and next(recorded, None) is not None:
+        raise ValueError("recording has more events than the regenerated load")
+
+    if persist:
+        _persist(finished, seed)
+
+    return {
+        "candidates": n_candidates,
+        "answers": events,
+        "completed": len(finished),
+        "wall_sec": wall,
+        "answers_per_sec": events / wall if wall else float("inf"),
+        "virtual_span_sec": max(last_shown.values(), default=0.0),
+        "submit_us": _percentiles(submit_us),
+        "think_ms": _percentiles(think_ms),
+        "peak_rss_mb": _peak_rss_mb(),
+        "mismatches": mismatches,
+    }
+
+
+def _persist(finished: Dict[int, ExamSession], seed: int) -> None:
+    """Log completed synthetic exams like real ones: a results row, their
+    responses, and their scores in the percentile sketches."""
+    stamp = datetime.now().isoformat(timespec="seconds")
+    sketches = percentile_sketch.SketchSet.load()
+    for c in sorted(finished):
+        s = finished[c]
+        attempt_id = f"loadgen-{seed}-{c}"
+        correct = sum(r.is_correct for r in s.responses)
+        attempted = len(s.responses)
+        duration = sum(r.elapsed_ms for r in s.responses) // 1000
+        append_result_csv(attempt_id, stamp, attempted, correct, 100.0 * correct / attempted,
+                          duration, len(s.exam))
+        append_responses_csv(attempt_id, stamp, s.form, s.responses)
+        overall, topics = percentile_sketch.attempt_scores(s.responses)
+        sketches.record(overall, topics, percentile_sketch.ranked_form(s.form))
+    sketches.save()
+
+
+def replay(log_path: str, questions: List[Question]) -> dict:
+    with open(log_path, "r", encoding="utf-8") as f:
+        header = json.loads(f.readline() or "null")
+        if not isinstance(header, dict) or header.get("type") != "run":
+            raise ValueError(f"{log_path}: missing run header")
+        try:
+            bank_ids = header["bank"]
+            profiles = [CandidateProfile(**d) for d in header["profiles"]]
+            n_candidates, seed = header["candidates"], header["seed"]
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"{log_path}: malformed run header ({type(e).__name__}: {e})") from None
+        if bank_ids != sorted(question_id(q) for q in questions):
+            raise ValueError(f"{log_path}: recorded against a different bank")
+        recorded = (json.loads(line) for line in f)
+        return run_load(questions, n_candidates, profiles, seed, recorded=recorded)
+
+
+# ---------------- CLI ----------------
+
+def _report(m: dict) -> None:
+    print(f"{m['candidates']} candidates, {m['answers']} answers, {m['completed']} completed exams "
+          f"({m['virtual_span_sec'] / 60:.1f} simulated minutes)")
+    print(f"Throughput: {m['answers_per_sec']:.0f} answers/s over {m['wall_sec']:.2f}s wall")
+    print("Engine submit latency (us): " + ", ".join(f"{k}={v:.1f}" for k, v in m["submit_us"].items()))
+    print("Think time (ms):             " + ", ".join(f"{k}={v:.0f}" for k, v in m["think_ms"].items()))
+    if m["peak_rss_mb"] is not None:
+        print(f"Peak RSS: {m['peak_rss_mb']:.1f} MB")
+
+
+def cli(args) -> None:
+    try:
+        _cli(args)
+    except (OSError, ValueError) as e:
+        print(f"[Loadgen] {e}")
+
+
+def _cli(args) -> None:
+    questions = load_questions(args.bank)
+    if args.replay:
+        m = replay(args.replay, questions)
+        _report(m)
+        if m["mismatches"]:
+            print(f"\n{len(m['mismatches'])} grading difference(s) vs the recording:")
+            for line in m["mismatches"][:20]:
+                print("  " + line)
+        else:
+            print("\nReplay matched the recording exactly.")
+        return
+
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 31)
+    m = run_load(questions, args.candidates, load_profiles(args.profiles), seed,
+                 log_path=args.log, persist=args.persist)
+    print(f"Seed {seed}" + (f", replay log {args.log}" if args.log else ""))
+    _report(m)
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""Streaming percentile ranks for exam scores using mergeable KLL sketches.
+
+A KLL sketch keeps a bounded number of sampled scores in levels. An item at
+level h stands for 2**h attempts. When a level fills up, it is sorted and
+every other item is promoted to the next level, where it carries twice the
+weight. The coin that picks odd or even items keeps the estimate unbiased.
+With the default k=200, rank error is about 1% whatever the number of
+attempts. Inserts are amortized O(1). Lookups bisect a cached CDF of at most
+a few hundred points, so their cost does not grow with the history.
+
+A SketchSet keeps one sketch overall, one per topic and one per form. It is
+persisted as a small JSON file next to the results CSV and updated by
+finish_exam(), so ranking a new attempt never re-reads the logs. Sketches
+from several machines merge level by level (`percentile --merge`), which
+gives fleet-wide rankings.
+"""
+from __future__ import annotations
+
+import csv
+import json
+import math
+import os
+import random
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ikm_python_practice import RESPONSES_CSV, Response
+
+SKETCH_JSON = "practice_percentiles.json"
+# Every template exam is its own one-off form; ranking within one is meaningless.
+UNRANKED_FORM_PREFIXES = ("templates@",)
+FORMAT_VERSION = 1
+DEFAULT_K = 200
+_C = 2 / 3        # capacity shrink factor per level below the top
+
+
+class KLLSketch:
+    def __init__(self, k: int = DEFAULT_K) -> None:
+        self.k = k
+        self.n = 0
+        self.levels: List[List[float]] = [[]]
+        self._rng = random.Random()
+        self._cdf: Optional[Tuple[List[float], List[int]]] = None
+
+    def _capacity(self, h: int) -> int:
+        depth = len(self.levels) - h - 1
+        return max(2, int(math.ceil(self.k * _C ** depth)))
+
+    def _compress(self) -> None:
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) >= self._capacity(h):
+                if h + 1 == len(self.levels):
+                    self.levels.append([])
+                level.sort()
+                # An odd item out stays behind so total weight stays exactly n.
+                keep = [level.pop()] if len(level) % 2 else []
+                self.levels[h + 1].extend(level[self._rng.randrange(2)::2])
+                self.levels[h] = keep
+            h += 1
+
+    def update(self, value: float) -> None:
+        self.levels[0].append(value)
+        self.n += 1
+        self._cdf = None
+        if len(self.levels[0]) >= self._capacity(0):
+            self._compress()
+
+    def merge(self, other: "KLLSketch") -> None:
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for h, level in enumerate(other.levels):
+            self.levels[h].extend(level)
+        self.n += other.n
+        self._cdf = None
+        self._compress()
+
+    def _table(self) -> Tuple[List[float], List[int]]:
+        """Sorted retained values and the cumulative weight up to each one."""
+        if self._cdf is None:
+            items = sorted((v, 1 << h) for h, level in enumerate(self.levels) for v in level)
+            values, cum, total = [], [], 0
+            for v, w in items:
+                total += w
+                values.append(v)
+                cum.append(total)
+            self._cdf = values, cum
+        return self._cdf
+
+    def percentile(self, value: float) -> Optional[float]:
+        """Percentile rank of `value` (ties count half), or None when empty."""
+        if not self.n:
+            return None
+        values, cum = self._table()
+        lo, hi = bisect_left(values, value), bisect_right(values, value)
+        below = cum[lo - 1] if lo else 0
+        at_or_below = cum[hi - 1] if hi else 0
+        return 100.0 * (below + at_or_below) / 2 / cum[-1]
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.n:
+            return None
+        values, cum = self._table()
+        return values[min(len(values) - 1, bisect_left(cum, q * cum[-1]))]
+
+    def to_dict(self) -> dict:
+        return {"n": self.n, "levels": [[round(v, 2) for v in level] for level in self.levels]}
+
+    @classmethod
+    def from_dict(cls, d: dict, k: int = DEFAULT_K) -> "KLLSketch":
+        """Raises ValueError unless `d` holds an int count and lists of numbers."""
+        if not isinstance(d, dict) or not _is_int(d.get("n")) or d["n"] < 0:
+            raise ValueError("sketch count 'n' must be a non-negative int")
+        levels = d.get("levels")
+        if not isinstance(levels, list) or not all(
+                isinstance(level, list) and all(_is_number(v) for v in level) for level in levels):
+            raise ValueError("sketch 'levels' must be lists of numbers")
+        s = cls(k)
+        s.n = d["n"]
+        s.levels = [list(level) for level in levels] or [[]]
+        return s
+
+
+def _is_int(v: object) -> bool:
+    return isinstance(v, int) and not isinstance(v, bool)
+
+
+def _is_number(v: object) -> bool:
+    return (_is_int(v) or isinstance(v, float)) and math.isfinite(v)
+
+
+def attempt_scores(responses: Iterable[Response]) -> Tuple[Optional[float], Dict[str, float]]:
+    """Overall score % and score % per topic for one attempt."""
+    total = right = 0
+    by_topic: Dict[str, List[int]] = {}
+    for r in responses:
+        total += 1
+        right += r.is_correct
+        t = by_topic.setdefault(r.topic, [0, 0])
+        t[0] += r.is_correct
+        t[1] += 1
+    overall = 100.0 * right / total if total else None
+    return overall, {topic: 100.0 * c / n for topic, (c, n) in by_topic.items()}
+
+
+class SketchSet:
+    """Sketches keyed "overall", "topic:<name>" and "form:<id>"."""
+
+    def __init__(self, k: int = DEFAULT_K) -> None:
+        self.k = k
+        self.sketches: Dict[str, KLLSketch] = {}
+
+    def _get(self, key: str) -> KLLSketch:
+        s = self.sketches.get(key)
+        if s is None:
+            s = self.sketches[key] = KLLSketch(self.k)
+        return s
+
+    def record(self, score_pct: float, topic_scores: Dict[str, float], form: str = "") -> None:
+        self._get("overall").update(score_pct)
+        if form:
+            self._get("form:" + form).update(score_pct)
+        for topic, pct in topic_scores.items():
+            self._get("topic:" + topic).update(pct)
+
+    def percentile(self, key: str, value: float) -> Optional[float]:
+        s = self.sketches.get(key)
+        return s.percentile(value) if s else None
+
+    def merge(self, other: "SketchSet") -> None:
+        for key, s in other.sketches.items():
+            self._get(key).merge(s)
+
+    def save(self, path: str = SKETCH_JSON) -> None:
+        data = {
+            "version": FORMAT_VERSION,
+            "k": self.k,
+            "sketches": {key: s.to_dict() for key, s in sorted(self.sketches.items())},
+        }
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str = SKETCH_JSON) -> "SketchSet":
+        """The sketches saved at `path`, or an empty set if there are none yet.
+        Raises ValueError if the file is not a sketch file this version can read."""
+        if not os.path.exists(path):
+            return cls()
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if not isinstance(data, dict) or data.get("version") != FORMAT_VERSION:
+            version = data.get("version") if isinstance(data, dict) else None
+            raise ValueError(f"{path}: unsupported sketch format {version}")
+        k, sketches = data.get("k"), data.get("sketches")
+        if not _is_int(k) or k < 1:
+            raise ValueError(f"{path}: malformed sketch file ('k' must be a positive int, got {k!r})")
+        if not isinstance(sketches, dict):
+            raise ValueError(f"{path}: malformed sketch file ('sketches' must be an object)")
+        out = cls(k)
+        for key, d in sketches.items():
+            try:
+                out.sketches[key] = KLLSketch.from_dict(d, k)
+            except ValueError as e:
+                raise ValueError(f"{path}: malformed sketch {key!r} ({e})") from None
+        return out
+
+
+def ranked_form(form: str) -> str:
+    """The form to keep a sketch for, or "" for one-off forms."""
+    return "" if form.startswith(UNRANKED_FORM_PREFIXES) else form
+
+
+def ordinal(n: int) -> str:
+    suffix = "th" if 10 <= n % 100 <= 20 else {1: "st", 2: "nd", 3: "rd"}.get(n % 10, "th")
+    return f"{n}{suffix}"
+
+
+def rank_label(p: float) -> str:
+    """A label such as "83rd", clamped to 1st..99th like published percentile ranks."""
+    return ordinal(min(99, max(1, int(round(p)))))
+
+
+def rank_attempt(responses: List[Response], form: str = "", path: str = SKETCH_JSON) -> Dict[str, float]:
+    """Rank one finished attempt against earlier ones, then add it to the sketches.
+
+    Returns percentile ranks keyed like the sketches; keys with no earlier
+    attempts are left out.
+    """
+    overall, topics = attempt_scores(responses)
+    if overall is None:
+        return {}
+    form = ranked_form(form)
+    sketches = SketchSet.load(path)
+    ranks = {}
+    wanted = [("overall", overall)] + ([("form:" + form, overall)] if form else [])
+    wanted += [("topic:" + t, pct) for t, pct in sorted(topics.items())]
+    for key, value in wanted:
+        p = sketches.percentile(key, value)
+        if p is not None:
+            ranks[key] = p
+    sketches.record(overall, topics, form)
+    sketches.save(path)
+    return ranks
+
+
+def rebuild_from_responses(path: str = RESPONSES_CSV, k: int = DEFAULT_K) -> SketchSet:
+    """Seed sketches from an existing per-response log, one attempt at a time."""
+    sketches = SketchSet(k)
+    current: Optional[str] = None
+    form = ""
+    batch: List[Response] = []
+
+    def flush() -> None:
+        overall, topics = attempt_scores(batch)
+        if overall is not None:
+            sketches.record(overall, topics, ranked_form(form))
+
+    with open(path, "r", newline="", encoding="utf-8") as fh:
+        for row in csv.DictReader(fh):
+            if row["attempt_id"] != current:
+                flush()
+                current, form, batch = row["attempt_id"], row["form"], []
+            batch.append(Response(row["question_id"], row["topic"], set(), int(row["n_options"]),
+                                  row["is_correct"] == "1", int(row["elapsed_ms"])))
+    flush()
+    return sketches
+
+
+# ---------------- CLI ----------------
+
+def _key(args) -> str:
+    if args.topic:
+        return "topic:" + args.topic
+    if args.form:
+        return "form:" + args.form
+    return "overall"
+
+
+def cli(args) -> None:
+    try:
+        _cli(args)
+    except (OSError, ValueError) as e:
+        print(f"[Percentile] {e}")
+
+
+def _cli(args) -> None:
+    if args.rebuild:
+        if not os.path.exists(args.responses):
+            print(f"[Percentile] No response log found at {args.responses}.")
+            return
+        sketches = rebuild_from_responses(args.responses)
+        sketches.save(args.sketch)
+        print(f"Rebuilt {len(sketches.sketches)} sketch(es) from {args.responses} into {args.sketch}")
+    elif args.merge:
+        sketches = SketchSet.load(args.sketch)
+        for path in args.merge:
+            sketches.merge(SketchSet.load(path))
+        sketches.save(args.sketch)
+        print(f"Merged {len(args.merge)} file(s) into {args.sketch}")
+    else:
+        sketches = SketchSet.load(args.sketch)
+
+    if args.score is not None:
+        key = _key(args)
+        p = sketches.percentile(key, args.score)
+        if p is None:
+            print(f"No attempts recorded for {key}.")
+        else:
+            print(f"{args.score:g}% is in the {rank_label(p)} percentile for {key} "
+                  f"({sketches.sketches[key].n} attempts)")
+        return
+
+    if not sketches.sketches:
+        print(f"No sketches in {args.sketch} yet.")
+        return
+    print(f"{'sketch':<32}{'attempts':>9}{'p25':>7}{'p50':>7}{'p75':>7}{'p90':>7}")
+    for key, s in sorted(sketches.sketches.items()):
+        qs = "".join(f"{s.quantile(q):>7.1f}" for q in (0.25, 0.5, 0.75, 0.9))
+        print(f"{key:<32}{s.n:>9}{qs}")
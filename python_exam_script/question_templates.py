@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""Parameterized question templates.
+
+A template is a prompt with named fields, a seeded generator that picks
+values for those fields, and an answer function that turns the values into
+options, the correct set and explanations. Every variant is identified by
+"<template name>@<seed>" and can be rebuilt from that ID alone, so attempts
+on generated exams can be regraded later.
+
+Templates are compiled once (prompt pre-split into literal/field parts) and
+variants are memoized per (name, seed), which keeps a fresh 54-question exam
+in the low-millisecond range.
+"""
+from __future__ import annotations
+
+import io
+import random
+import string
+import time
+from contextlib import redirect_stdout
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, List, Set, Tuple
+
+from ikm_python_practice import TOTAL_QUESTIONS, Question, question_id
+
+# Template exams are logged with form "templates@<exam seed>", which is all
+# that is needed to rebuild every variant in them.
+FORM_PREFIX = "templates@"
+
+# Draws per template before it counts as out of distinct prompts for an exam.
+MAX_REDRAWS = 50
+
+Params = Dict[str, object]
+# options, indices of correct options, explanation per option index
+Answer = Tuple[List[str], Set[int], Dict[int, str]]
+
+
+@dataclass(frozen=True)
+class QuestionTemplate:
+    name: str
+    topic: str
+    prompt: str
+    generate: Callable[[random.Random], Params]
+    answer: Callable[[Params, random.Random], Answer]
+
+
+# ---------------- Helpers ----------------
+
+def _choices(correct: str, distractors: List[Tuple[str, str]], right_why: str,
+             rng: random.Random) -> Answer:
+    """Shuffle one correct option in with distinct distractors (text, why-wrong)."""
+    seen = {correct}
+    picked = [(correct, "Correct. " + right_why)]
+    for text, why in distractors:
+        if text not in seen and len(picked) < 4:
+            seen.add(text)
+            picked.append((text, "Wrong. " + why))
+    rng.shuffle(picked)
+    options = [t for t, _ in picked]
+    correct_idx = {i for i, (t, _) in enumerate(picked) if t == correct}
+    explanations = {i: why for i, (_, why) in enumerate(picked)}
+    return options, correct_idx, explanations
+
+
+# ---------------- Templates ----------------
+
+def _gen_division_type(rng: random.Random) -> Params:
+    op = rng.choice(["/", "//", "%", "**"])
+    a = rng.randint(2, 20)
+    b = rng.randint(1, 9)
+    if op == "**":
+        b = rng.choice([-2, -1, 2, 3])
+    return {"a": a, "b": b, "op": op}
+
+
+def _ans_division_type(p: Params, rng: random.Random) -> Answer:
+    a, b, op = p["a"], p["b"], p["op"]
+    result = {"/": lambda: a / b, "//": lambda: a // b, "%": lambda: a % b, "**": lambda: a ** b}[op]()
+    right = f"<class '{type(result).__name__}'>"
+    why = {
+        "/": "/ is true division and always returns a float in Python 3.",
+        "//": "// on two ints is floor division and returns an int.",
+        "%": "% on two ints returns an int.",
+        "**": "int ** negative int returns a float; a non-negative exponent keeps an int.",
+    }[op]
+    other = "<class 'float'>" if right == "<class 'int'>" else "<class 'int'>"
+    return _choices(right, [
+        (other, f"{a} {op} {b} evaluates to {result!r}."),
+        ("<class 'decimal.Decimal'>", "Decimal is only used if explicitly created."),
+        ("TypeError", "No exception is raised."),
+    ], why, rng)
+
+
+def _gen_float_sum(rng: random.Random) -> Params:
+    x = rng.randint(1, 9) / 10
+    y = rng.randint(1, 9) / 10
+    return {"x": x, "y": y, "z": round(x + y, 1)}
+
+
+def _ans_float_sum(p: Params, rng: random.Random) -> Answer:
+    x, y, z = p["x"], p["y"], p["z"]
+    result = x + y == z
+    why = ("The binary sum happens to round to the same double as the literal."
+           if result else
+           f"{x}+{y} is {x + y!r} in binary floating point, not exactly {z}.")
+    return _choices(str(result), [
+        (str(not result), "Compare the exact doubles: " + repr(x + y) + " vs " + repr(z) + "."),
+        ("TypeError", "No exception is raised."),
+        ("Depends on OS", "IEEE-754 behavior is consistent across platforms."),
+    ], why, rng)
+
+
+def _gen_floor_negative(rng: random.Random) -> Params:
+    # Exactly one negative operand and a non-zero remainder, so floor != truncate.
+    a = rng.randint(5, 30)
+    b = rng.randint(2, 7)
+    if a % b == 0:
+        a += 1
+    if rng.random() < 0.5:
+        return {"a": -a, "b": b}
+    return {"a": a, "b": -b}
+
+
+def _ans_floor_negative(p: Params, rng: random.Random) -> Answer:
+    a, b = p["a"], p["b"]
+    result = a // b
+    trunc = int(a / b)
+    return _choices(str(result), [
+        (str(trunc), "That truncates toward zero; // floors toward negative infinity."),
+        (repr(a / b), "That is true division (/), not floor division."),
+        (str(-result), "Check the sign: one operand is negative."),
+        (str(abs(a) // abs(b)), "The signs are not ignored."),
+    ], f"{a} / {b} is {a / b:.4g}; flooring toward negative infinity gives {result}.", rng)
+
+
+def _gen_slice(rng: random.Random) -> Params:
+    n = rng.randint(6, 10)
+    i = rng.randint(0, 3)
+    j = rng.randint(i + 3, n)
+    k = rng.choice([1, 2, 3, -1])
+    if k < 0:
+        i, j = j - 1, i
+    return {"n": n, "i": i, "j": j, "k": k}
+
+
+def _ans_slice(p: Params, rng: random.Random) -> Answer:
+    n, i, j, k = p["n"], p["i"], p["j"], p["k"]
+    seq = list(range(n))
+    result = seq[i:j:k]
+    return _choices(str(result), [
+        (str(seq[i:j + 1:k]), "The stop index is exclusive."),
+        (str(seq[i + 1:j:k] if k > 0 else seq[i - 1:j:k]), "Slicing starts at the start index itself."),
+        (str(seq[j:i:k]), "Start and stop are not swapped."),
+        ("[]", "The slice is non-empty."),
+        (str(seq[i:j]), "The step is applied."),
+        (str(result[::-1]), "Elements come out in slicing order."),
+        (str(seq[i:j - 1:k]), "Only the element at the stop index is excluded."),
+    ], f"range({n})[{i}:{j}:{k}] starts at {i}, steps by {k} and stops before {j}.", rng)
+
+
+def _gen_bool_math(rng: random.Random) -> Params:
+    return {"flag": rng.choice([True, False]), "n": rng.randint(1, 9), "op": rng.choice(["+", "*"])}
+
+
+def _ans_bool_math(p: Params, rng: random.Random) -> Answer:
+    flag, n, op = p["flag"], p["n"], p["op"]
+    result = flag + n if op == "+" else flag * n
+    return _choices(str(result), [
+        ("TypeError", "bool is a subclass of int, so arithmetic is allowed."),
+        (f"{flag}{n}", "This is numeric arithmetic, not string concatenation."),
+        (str(n), f"{flag} counts as {int(flag)}."),
+        (str(n + 1), f"{flag} counts as {int(flag)}."),
+        (str(not flag), "The result is an int, not a bool."),
+    ], f"{flag} behaves as the int {int(flag)} here.", rng)
+
+
+def _gen_str_repeat(rng: random.Random) -> Params:
+    return {"s": rng.choice(["ab", "xy", "na", "hi"]), "n": rng.randint(0, 3)}
+
+
+def _ans_str_repeat(p: Params, rng: random.Random) -> Answer:
+    s, n = p["s"], p["n"]
+    result = s * n
+    # Options are printed output, like the bank's own print('ab' * 0) question.
+    return _choices(result, [
+        (s + str(n), "* on a str repeats it; it does not append the number."),
+        ("TypeError", "str * int is a valid operation."),
+        (s * (n + 1), f"The string is repeated exactly {n} time(s)."),
+        (s, f"The string is repeated {n} time(s), not once."),
+    ], f"'{s}' repeated {n} time(s) is {result!r}.", rng)
+
+
+TEMPLATES: Dict[str, QuestionTemplate] = {t.name: t for t in [
+    QuestionTemplate("division-type", "Basics",
+                     "What is the output?\n\nprint(type({a} {op} {b}))",
+                     _gen_division_type, _ans_division_type),
+    QuestionTemplate("float-sum-equality", "Numerics",
+                     "What does this print?\n\nprint({x} + {y} == {z})",
+                     _gen_float_sum, _ans_float_sum),
+    QuestionTemplate("floor-division-sign", "Numerics",
+                     "What does this print?\n\nprint({a} // {b})",
+                     _gen_floor_negative, _ans_floor_negative),
+    QuestionTemplate("slice-step", "Sequences",
+                     "What does this print?\n\nprint(list(range({n}))[{i}:{j}:{k}])",
+                     _gen_slice, _ans_slice),
+    QuestionTemplate("bool-arithmetic", "Truthiness",
+                     "What does this print?\n\nprint({flag} {op} {n})",
+                     _gen_bool_math, _ans_bool_math),
+    QuestionTemplate("string-repeat", "Strings",
+                     "What does this print?\n\nprint('{s}' * {n})",
+                     _gen_str_repeat, _ans_str_repeat),
+]}
+
+
+# ---------------- Compilation + Variants ----------------
+
+@lru_cache(maxsize=None)
+def compile_prompt(prompt: str) -> Tuple[Tuple[str, str], ...]:
+    """Pre-split a prompt into (literal, field name) pairs once."""
+    return tuple((lit, field or "") for lit, field, _, _ in string.Formatter().parse(prompt))
+
+
+def render_prompt(prompt: str, params: Params) -> str:
+    return "".join(lit + (str(params[field]) if field else "") for lit, field in compile_prompt(prompt))
+
+
+@lru_cache(maxsize=4096)
+def variant(name: str, seed: int) -> Question:
+    """The variant of template `name` for `seed`; the same inputs always give the same question."""
+    t = TEMPLATES[name]
+    rng = random.Random(f"{name}@{seed}")
+    params = t.generate(rng)
+    options, correct, explanations = t.answer(params, rng)
+    return Question(
+        prompt=render_prompt(t.prompt, params),
+        options=options,
+        correct=correct,
+        topic=t.topic,
+        explanations=explanations,
+    )
+
+
+def variant_id(name: str, seed: int) -> str:
+    return f"{name}@{seed}"
+
+
+def variant_from_id(vid: str) -> Question:
+    name, _, seed = vid.rpartition("@")
+    return variant(name, int(seed))
+
+
+def generate_exam(seed: int, count: int = TOTAL_QUESTIONS) -> List[Tuple[str, Question]]:
+    """A reproducible exam of `count` template variants as (variant ID, question) pairs.
+
+    Templates take turns. A variant whose prompt is already in the exam is
+    redrawn, and a template that keeps clashing (small parameter space, e.g.
+    string-repeat) drops out, so the exam can come up short rather than
+    repeat a question.
+    """
+    rng = random.Random(seed)
+    names = sorted(TEMPLATES)
+    out = []
+    prompts: Set[str] = set()
+    exhausted: Set[str] = set()
+    turn = 0
+    while len(out) < count and len(exhausted) < len(names):
+        name = names[turn % len(names)]
+        turn += 1
+        if name in exhausted:
+            continue
+        for _ in range(MAX_REDRAWS):
+            vseed = rng.getrandbits(32)
+            q = variant(name, vseed)
+            if q.prompt not in prompts:
+                break
+        else:
+            exhausted.add(name)
+            continue
+        prompts.add(q.prompt)
+        out.append((variant_id(name, vseed), q))
+    rng.shuffle(out)
+    return out
+
+
+def executed_output(q: Question) -> str:
+    """What the code in a template prompt actually prints, or the exception name."""
+    code = q.prompt.split("\n\n", 1)[1]
+    buf = io.StringIO()
+    try:
+        with redirect_stdout(buf):
+            exec(code, {})
+    except Exception as e:
+        return type(e).__name__
+    return buf.getvalue().rstrip("\n")
+
+
+def check_templates(seeds: int) -> List[str]:
+    """Variant IDs, over the first `seeds` seeds of every template, whose correct
+    option is not what the prompt's code prints."""
+    bad = []
+    for name in sorted(TEMPLATES):
+        for seed in range(seeds):
+            q = variant(name, seed)
+            if {q.options[i] for i in q.correct} != {executed_output(q)}:
+                bad.append(variant_id(name, seed))
+    return bad
+
+
+def exam_form(seed: int) -> str:
+    return f"{FORM_PREFIX}{seed}"
+
+
+def variants_by_question_id(form: str) -> Dict[str, str]:
+    """question_id -> variant ID for an exam logged under `form` (see exam_form),
+    so its logged responses can be regraded against rebuilt variants."""
+    seed = int(form[len(FORM_PREFIX):])
+    return {question_id(q): vid for vid, q in generate_exam(seed)}
+
+
+# ---------------- CLI ----------------
+
+def cli(args) -> int:
+    if args.show:
+        q = variant_from_id(args.show)
+        print(f"[{args.show}] {q.topic}\n\n{q.prompt}\n")
+        for i, opt in enumerate(q.options):
+            mark = "*" if i in q.correct else " "
+            print(f" {mark} {opt}\n      {q.explanations[i]}")
+        return 0
+
+    if args.check:
+        bad = check_templates(args.check)
+        for vid in bad:
+            print(f"[Templates] {vid}: correct option is not the printed output "
+                  f"{executed_output(variant_from_id(vid))!r}")
+        print(f"Checked {args.check} seed(s) of {len(TEMPLATES)} templates: {len(bad)} wrong answer key(s).")
+        return 1 if bad else 0
+
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    t0 = time.perf_counter()
+    exam = generate_exam(seed, args.count)
+    ms = (time.perf_counter() - t0) * 1000
+    for vid, q in exam:
+        print(f"{vid:<32} {question_id(q)}  {q.topic:<12} {q.prompt.splitlines()[-1]}")
+    print(f"\nGenerated {len(exam)} variants from seed {seed} in {ms:.2f} ms "
+          f"(logged as form {exam_form(seed)}).")
+    return 0
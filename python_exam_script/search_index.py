@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""Inverted-index full-text search over the question bank.
+
+The index covers prompt, options and explanations. It is built once and
+persisted next to the bank (see index_path_for); a fingerprint of the
+question IDs tells us when the persisted copy is stale.
+
+Query syntax (terms are ANDed):
+    yield                   match a term
+    super()                 match a call of `super` specifically
+    yield OR await          either term
+    -lambda / NOT lambda    exclude a term
+    topic:Generators        restrict to a topic (case-insensitive, _ for spaces)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import re
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+from ikm_python_practice import Question, load_questions, question_id
+
+INDEX_VERSION = 1
+DEFAULT_INDEX = "question_index.json"
+
+# Field weights: a hit in the prompt says more than a hit in an explanation.
+FIELD_WEIGHTS = {"prompt": 3, "options": 2, "explanations": 1}
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Identifiers (optionally followed by "()"), numbers, and dunder names.
+_TOKEN_RE = re.compile(r"[a-z_][a-z0-9_]*(?:\(\))?|\d+(?:\.\d+)?")
+
+
+# ---------------- Tokenizing ----------------
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased terms; `super()` yields both "super()" and "super"."""
+    out = []
+    for tok in _TOKEN_RE.findall(text.lower()):
+        out.append(tok)
+        if tok.endswith("()"):
+            out.append(tok[:-2])
+    return out
+
+
+def question_terms(q: Question) -> Counter:
+    tf: Counter = Counter()
+    fields = {
+        "prompt": q.prompt,
+        "options": "\n".join(q.options),
+        "explanations": "\n".join(q.explanations.values()),
+    }
+    for name, text in fields.items():
+        w = FIELD_WEIGHTS[name]
+        for tok in tokenize(text):
+            tf[tok] += w
+    return tf
+
+
+def bank_fingerprint(questions: List[Question]) -> str:
+    h = hashlib.sha1()
+    for q in questions:
+        h.update(question_id(q).encode("ascii"))
+        h.update(q.topic.encode("utf-8"))
+        for k in sorted(q.explanations):
+            h.update(q.explanations[k].encode("utf-8"))
+    return h.hexdigest()
+
+
+# ---------------- Index ----------------
+
+class SearchIndex:
+    """Postings are term -> {doc: weighted tf}.
+
+    Docs are bank positions, except in indexes maintained with with_changes():
+    there docs are stable slots (None in `ids` marks a free slot) and
+    `positions` maps each slot to its current bank position.
+    """
+
+    def __init__(
+        self,
+        ids: List[Optional[str]],
+        topics: List[Optional[str]],
+        doc_len: List[int],
+        postings: Dict[str, Dict[int, int]],
+        fingerprint: str,
+        positions: Optional[List[Optional[int]]] = None,
+    ) -> None:
+        self.ids = ids
+        self.topics = topics
+        self.doc_len = doc_len
+        self.postings = postings
+        self.fingerprint = fingerprint
+        self.positions = positions
+        self._by_topic: Dict[str, Set[int]] = {}
+        for doc, topic in enumerate(topics):
+            if topic is not None:
+                self._by_topic.setdefault(topic.lower(), set()).add(doc)
+        self.n_docs = sum(len(docs) for docs in self._by_topic.values())
+        self.avg_len = (sum(doc_len) / self.n_docs) if self.n_docs else 0.0
+
+    @classmethod
+    def build(cls, questions: List[Question]) -> "SearchIndex":
+        return cls.from_terms(questions, [question_terms(q) for q in questions])
+
+    @classmethod
+    def from_terms(
+        cls, questions: List[Question], term_counts: List[Counter], ids: Optional[List[str]] = None
+    ) -> "SearchIndex":
+        """Build from precomputed question_terms() output (and question IDs, if
+        the caller has them) so callers can cache per-question work."""
+        postings: Dict[str, Dict[int, int]] = {}
+        doc_len = []
+        for doc, tf in enumerate(term_counts):
+            doc_len.append(sum(tf.values()))
+            for term, n in tf.items():
+                postings.setdefault(term, {})[doc] = n
+        return cls(
+            ids=ids if ids is not None else [question_id(q) for q in questions],
+            topics=[q.topic for q in questions],
+            doc_len=doc_len,
+            postings=postings,
+            fingerprint=bank_fingerprint(questions),
+        )
+
+    def with_changes(
+        self,
+        removed: Dict[int, Counter],
+        added: Dict[int, Tuple[str, str, Counter]],
+        positions: List[Optional[int]],
+        fingerprint: str,
+    ) -> "SearchIndex":
+        """A new index with the `removed` slots (slot -> terms) dropped and the
+        `added` slots (slot -> (ID, topic, terms)) filled in.
+
+        Only the postings of terms in changed docs are copied, so this index is
+        left untouched for anyone still holding it. Apart from copying the
+        per-slot lists and the outer postings dict, the cost is proportional to
+        the changed docs.
+        """
+        size = max([len(self.ids)] + [slot + 1 for slot in added])
+        pad = [None] * (size - len(self.ids))
+        ids, topics = self.ids + pad, self.topics + pad
+        doc_len = self.doc_len + [0] * len(pad)
+        postings = dict(self.postings)
+        copied: Set[str] = set()
+
+        def own(term: str) -> Dict[int, int]:
+            if term not in copied:
+                postings[term] = dict(postings.get(term, ()))
+                copied.add(term)
+            return postings[term]
+
+        for slot, tf in removed.items():
+            for term in tf:
+                p = own(term)
+                p.pop(slot, None)
+                if not p:
+                    del postings[term]
+                    copied.discard(term)
+            ids[slot] = topics[slot] = None
+            doc_len[slot] = 0
+        for slot, (qid, topic, tf) in added.items():
+            for term, n in tf.items():
+                own(term)[slot] = n
+            ids[slot], topics[slot] = qid, topic
+            doc_len[slot] = sum(tf.values())
+        return SearchIndex(ids, topics, doc_len, postings, fingerprint, positions)
+
+    # ----- persistence -----
+
+    def save(self, path: str) -> None:
+        data = {
+            "version": INDEX_VERSION,
+            "fingerprint": self.fingerprint,
+            "ids": self.ids,
+            "topics": self.topics,
+            "doc_len": self.doc_len,
+            # flat [doc, tf, doc, tf, ...] keeps the file compact
+            "postings": {t: [x for pair in sorted(p.items()) for x in pair] for t, p in self.postings.items()},
+        }
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["SearchIndex"]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != INDEX_VERSION:
+            return None
+        postings = {t: dict(zip(flat[::2], flat[1::2])) for t, flat in data["postings"].items()}
+        return cls(data["ids"], data["topics"], data["doc_len"], postings, data["fingerprint"])
+
+    # ----- querying -----
+
+    def _idf(self, term: str) -> float:
+        n = self.n_docs
+        df = len(self.postings.get(term, ()))
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def _docs(self, term: str) -> Set[int]:
+        return set(self.postings.get(term, ()))
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[float, int]]:
+        """Return (score, bank position) pairs, best first."""
+        groups, excluded, topics = parse_query(query)
+        if not groups and not topics:
+            return []
+
+        candidates: Optional[Set[int]] = None
+        for group in groups:
+            docs: Set[int] = set()
+            for term in group:
+                docs |= self._docs(term)
+            candidates = docs if candidates is None else candidates & docs
+        if candidates is None:
+            candidates = {doc for doc, qid in enumerate(self.ids) if qid is not None}
+        if topics:
+            allowed: Set[int] = set()
+            for t in topics:
+                allowed |= self._by_topic.get(t, set())
+            candidates &= allowed
+        for term in excluded:
+            candidates -= self._docs(term)
+
+        terms = [t for group in groups for t in group]
+        scored = []
+        for doc in candidates:
+            norm = K1 * (1 - B + B * self.doc_len[doc] / (self.avg_len or 1))
+            score = 0.0
+            for term in terms:
+                tf = self.postings.get(term, {}).get(doc, 0)
+                if tf:
+                    score += self._idf(term) * tf * (K1 + 1) / (tf + norm)
+            scored.append((score, doc))
+        if self.positions is not None:
+            scored = [(score, self.positions[doc]) for score, doc in scored]
+        scored.sort(key=lambda x: (-x[0], x[1]))
+        return scored[:limit]
+
+
+def parse_query(query: str) -> Tuple[List[List[str]], List[str], List[str]]:
+    """Split a query into (AND-of-OR term groups, excluded terms, topics)."""
+    groups: List[List[str]] = []
+    excluded: List[str] = []
+    topics: List[str] = []
+    join_next = False
+    negate_next = False
+    for word in query.split():
+        if word == "OR":
+            join_next = bool(groups)
+            continue
+        if word == "NOT":
+            negate_next = True
+            continue
+        if negate_next:
+            excluded.extend(tokenize(word))
+            negate_next = False
+            continue
+        if word.lower().startswith("topic:"):
+            topics.append(word[6:].lower().replace("_", " "))
+            continue
+        if word.startswith("-") and len(word) > 1:
+            excluded.extend(tokenize(word[1:]))
+            continue
+        terms = tokenize(word)
+        # "super()" should not also match plain "super" mentions
+        if len(terms) == 2 and terms[0].endswith("()"):
+            terms = terms[:1]
+        if not terms:
+            continue
+        if join_next:
+            groups[-1].extend(terms)
+        else:
+            groups.append(terms)
+        join_next = False
+    return groups, excluded, topics
+
+
+def index_path_for(bank_path: Optional[str]) -> str:
+    if bank_path is None:
+        return DEFAULT_INDEX
+    return os.path.splitext(bank_path)[0] + ".index.json"
+
+
+def load_or_build_index(
+    questions: List[Question], path: str, rebuild: bool = False
+) -> SearchIndex:
+    """Use the persisted index when it matches the bank, else rebuild and save it."""
+    fp = bank_fingerprint(questions)
+    if not rebuild:
+        idx = SearchIndex.load(path)
+        if idx is not None and idx.fingerprint == fp:
+            return idx
+    idx = SearchIndex.build(questions)
+    idx.save(path)
+    return idx
+
+
+# ---------------- CLI ----------------
+
+def cli(args) -> None:
+    questions = load_questions(args.bank)
+    path = index_path_for(args.bank)
+    idx = load_or_build_index(questions, path, rebuild=args.rebuild)
+
+    query = " ".join(args.query)
+    t0 = time.perf_counter()
+    hits = idx.search(query, limit=args.limit)
+    ms = (time.perf_counter() - t0) * 1000
+
+    print(f"{len(hits)} result(s) for {query!r} in {ms:.2f} ms")
+    for rank, (score, doc) in enumerate(hits, 1):
+        q = questions[doc]
+        first_line = q.prompt.splitlines()[0]
+        print(f"{rank:>3}. [{idx.ids[doc]}] {q.topic:<14} {score:6.2f}  {first_line}")
@@ -1,6 +1,4 @@
 import React, { useEffect, useMemo, useRef, useState } from 'react'
-import { Prism as SyntaxHighlighter } from "react-syntax-highlighter";
-import { oneLight } from "react-syntax-highlighter/dist/esm/styles/prism";
 
 
 const TOTAL_QUESTIONS = 54
@@ -29,41 +27,44 @@ function saveSeenSet(set) {
   localStorage.setItem(LS_SEEN, JSON.stringify([...set]));
 }
 
-// crude but effective “is this code?” check
-function looksLikeCode(text) {
-  return (
-    text.includes("\n") &&
-    (text.includes("def ") ||
-      text.includes("class ") ||
-      text.includes("for ") ||
-      text.includes("if ") ||
-      text.includes("import ") ||
-      text.includes("return ") ||
-      text.includes("print("))
-  );
+// Same order as TOKEN_KINDS in python_exam_script/ikm_python_practice.py
+const TOKEN_KINDS = ["keyword", "builtin", "string", "number", "comment"];
+
+// One code block exported by `export`: [start, end, s0, e0, k0, s1, e1, k1, ...]
+// with token offsets relative to `start`.
+function CodeBlock({ code, flat }) {
+  const out = [];
+  let pos = 0;
+  for (let i = 2; i < flat.length; i += 3) {
+    const [s, e, k] = [flat[i], flat[i + 1], flat[i + 2]];
+    if (s > pos) out.push(code.slice(pos, s));
+    out.push(<span key={i} className={`tok-${TOKEN_KINDS[k]}`}>{code.slice(s, e)}</span>);
+    pos = e;
+  }
+  out.push(code.slice(pos));
+  return <code className="codeBlock">{out}</code>;
 }
 
-export function PromptText({ text }) {
-  if (looksLikeCode(text)) {
-    return (
-      <SyntaxHighlighter
-        language="python"
-        style={oneLight}
-        customStyle={{
-          margin: 0,
-          borderRadius: 12,
-          padding: 16,
-          fontSize: 14,
-          lineHeight: 1.5,
-        }}
-      >
-        {text}
-      </SyntaxHighlighter>
-    );
+// Renders prose as-is and code blocks from the spans precomputed at export
+// time (q.code), so no tokenizing happens in the browser.
+export function PromptText({ text, blocks }) {
+  if (!blocks?.length) {
+    // normal paragraph text (keeps your newlines)
+    return <div style={{ whiteSpace: "pre-wrap" }}>{text}</div>;
   }
 
-  // normal paragraph text (keeps your newlines)
-  return <div style={{ whiteSpace: "pre-wrap" }}>{text}</div>;
+  const parts = [];
+  let pos = 0;
+  for (const flat of blocks) {
+    const [start, end] = flat;
+    const prose = text.slice(pos, start).replace(/^\n+|\n+$/g, "");
+    if (prose) parts.push(<div key={`p${start}`} style={{ whiteSpace: "pre-wrap" }}>{prose}</div>);
+    parts.push(<CodeBlock key={`c${start}`} code={text.slice(start, end)} flat={flat} />);
+    pos = end;
+  }
+  const tail = text.slice(pos).replace(/^\n+|\n+$/g, "");
+  if (tail) parts.push(<div key="tail" style={{ whiteSpace: "pre-wrap" }}>{tail}</div>);
+  return <div className="rich">{parts}</div>;
 }
 
 function loadQueue() {
@@ -679,7 +680,7 @@ const q = exam[idx]
             </div>
 
             <pre className="prompt">
-                <PromptText text={q.prompt} />
+                <PromptText text={q.prompt} blocks={q.code?.prompt} />
             </pre>
 
             <div className="opts">
@@ -701,7 +702,7 @@ const q = exam[idx]
                   >
                     <span className="letter">{LETTERS[oi]}</span>
                     <span className="optText">
-                        <PromptText text={opt} />
+                        <PromptText text={opt} blocks={q.code?.options?.[String(oi)]} />
                     </span>
                   </button>
                 )